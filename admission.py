@@ -0,0 +1,225 @@
+"""
+AIB Quote Manager - Admission Control
+Cost-aware request admission for the AI service.
+
+Every request is checked in three steps before a route runs:
+
+1. Body size - oversized bodies are rejected from Content-Length alone,
+   before any JSON parsing.
+2. Cost - the request's work is estimated from the number of quotes and
+   the amount of text it carries; requests above the per-request ceiling
+   are rejected.
+3. Budgets - the cost is charged to the client's token bucket, and the
+   request takes one of a fixed number of global concurrency slots.
+
+Rejections carry a Retry-After hint. All limits are read from the
+environment and reported by the /api/metrics route.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import Counter
+
+from flask import g, jsonify, request
+
+# Routes that are always admitted (monitoring must keep working under load)
+EXEMPT_PATHS = {'/api/health', '/api/metrics'}
+
+# Idle buckets are pruned once this many clients are being tracked
+MAX_TRACKED_CLIENTS = 10000
+
+
+def _env_number(name, default, cast=float):
+    value = os.environ.get(name)
+    return cast(value) if value not in (None, '') else default
+
+
+class AdmissionConfig:
+    """Admission limits, overridable through AI_* environment variables"""
+
+    def __init__(self, max_body_bytes=2 * 1024 * 1024, max_request_cost=100.0,
+                 bucket_capacity=200.0, refill_per_second=20.0, max_concurrent=8,
+                 quotes_per_unit=100, chars_per_unit=10000):
+        self.max_body_bytes = max_body_bytes
+        self.max_request_cost = max_request_cost
+        self.bucket_capacity = bucket_capacity
+        self.refill_per_second = refill_per_second
+        self.max_concurrent = max_concurrent
+        self.quotes_per_unit = quotes_per_unit
+        self.chars_per_unit = chars_per_unit
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_body_bytes=_env_number('AI_MAX_BODY_BYTES', 2 * 1024 * 1024, int),
+            max_request_cost=_env_number('AI_MAX_REQUEST_COST', 100.0),
+            bucket_capacity=_env_number('AI_RATE_BUCKET_CAPACITY', 200.0),
+            refill_per_second=_env_number('AI_RATE_REFILL_PER_SECOND', 20.0),
+            max_concurrent=_env_number('AI_MAX_CONCURRENT', 8, int),
+            quotes_per_unit=_env_number('AI_COST_QUOTES_PER_UNIT', 100, int),
+            chars_per_unit=_env_number('AI_COST_CHARS_PER_UNIT', 10000, int),
+        )
+
+    @property
+    def cost_ceiling(self):
+        """Largest admissible request cost
+
+        A cost above the bucket capacity could never be paid, however long
+        the client waited, so it is rejected like any other oversized request.
+        """
+        return min(self.max_request_cost, self.bucket_capacity)
+
+    def to_dict(self):
+        return {
+            'maxBodyBytes': self.max_body_bytes,
+            'maxRequestCost': self.max_request_cost,
+            'costCeiling': self.cost_ceiling,
+            'bucketCapacity': self.bucket_capacity,
+            'refillPerSecond': self.refill_per_second,
+            'maxConcurrent': self.max_concurrent,
+            'quotesPerUnit': self.quotes_per_unit,
+            'charsPerUnit': self.chars_per_unit
+        }
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a fixed rate"""
+
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated = now
+
+    def take(self, cost, now=None):
+        """Spend cost tokens; return 0 on success or seconds until affordable"""
+        self._refill(time.monotonic() if now is None else now)
+        if cost <= self.tokens:
+            self.tokens -= cost
+            return 0
+        if self.refill_per_second <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.refill_per_second
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+def estimate_cost(data, config):
+    """Estimate a request's work from its collection size and text length"""
+    if not isinstance(data, dict):
+        return 1.0
+
+    quotes = data.get('quotes') or []
+    if not isinstance(quotes, list):
+        quotes = []
+    chars = len(str(data.get('text', ''))) + len(str(data.get('query', '')))
+    for quote in quotes:
+        if isinstance(quote, dict):
+            chars += len(str(quote.get('text', '')))
+
+    return 1.0 + len(quotes) / config.quotes_per_unit + chars / config.chars_per_unit
+
+
+class AdmissionController:
+    """Applies body-size, cost, rate and concurrency limits to a Flask app"""
+
+    def __init__(self, config=None):
+        self.config = config or AdmissionConfig.from_env()
+        self.buckets = {}
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(self.config.max_concurrent)
+        self.in_flight = 0
+        self.admitted = 0
+        self.admitted_cost = 0.0
+        self.rejected = Counter()
+
+    def install(self, app):
+        """Register the admission hooks on app"""
+        # Also enforced by Werkzeug for bodies without a Content-Length
+        app.config['MAX_CONTENT_LENGTH'] = self.config.max_body_bytes
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+
+    def client_id(self):
+        return request.remote_addr or 'unknown'
+
+    def before_request(self):
+        if request.path in EXEMPT_PATHS or request.method == 'OPTIONS':
+            return None
+
+        length = request.content_length
+        if length is not None and length > self.config.max_body_bytes:
+            return self._reject('body_too_large', 413,
+                                f'Request body exceeds {self.config.max_body_bytes} bytes')
+
+        data = request.get_json(silent=True) if request.method == 'POST' else None
+        cost = estimate_cost(data, self.config)
+        if cost > self.config.cost_ceiling:
+            return self._reject('cost_too_high', 413,
+                                f'Request cost {cost:.1f} exceeds limit of {self.config.cost_ceiling}')
+
+        client = self.client_id()
+        with self.lock:
+            bucket = self.buckets.get(client)
+            if bucket is None:
+                self._prune_buckets()
+                bucket = TokenBucket(self.config.bucket_capacity, self.config.refill_per_second)
+                self.buckets[client] = bucket
+            wait = bucket.take(cost)
+        if wait:
+            return self._reject('rate_limited', 429, 'Rate limit exceeded', retry_after=wait)
+
+        if not self.slots.acquire(blocking=False):
+            # The request did no work, so give its budget back
+            with self.lock:
+                bucket.tokens = min(bucket.capacity, bucket.tokens + cost)
+            return self._reject('overloaded', 503, 'Server is at capacity', retry_after=1)
+
+        g.admission_slot = True
+        with self.lock:
+            self.in_flight += 1
+            self.admitted += 1
+            self.admitted_cost += cost
+        return None
+
+    def teardown_request(self, exc=None):
+        if g.pop('admission_slot', False):
+            with self.lock:
+                self.in_flight -= 1
+            self.slots.release()
+
+    def _prune_buckets(self):
+        if len(self.buckets) < MAX_TRACKED_CLIENTS:
+            return
+        now = time.monotonic()
+        for client in [client for client, bucket in self.buckets.items() if bucket.is_full(now)]:
+            del self.buckets[client]
+
+    def _reject(self, reason, status, message, retry_after=None):
+        with self.lock:
+            self.rejected[reason] += 1
+        response = jsonify({'error': message, 'reason': reason})
+        response.status_code = status
+        if retry_after is not None:
+            response.headers['Retry-After'] = str(max(1, math.ceil(min(retry_after, 3600))))
+        return response
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'limits': self.config.to_dict(),
+                'inFlight': self.in_flight,
+                'admitted': self.admitted,
+                'admittedCost': round(self.admitted_cost, 2),
+                'rejected': dict(self.rejected),
+                'trackedClients': len(self.buckets)
+            }
@@ -23,9 +23,12 @@ from flask_cors import CORS
 from textblob import TextBlob
 import nltk
 import re
+import zlib
 from typing import Dict, List, Any
 import logging
 
+from corpus_stats import CorpusStats
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -64,6 +67,12 @@ class QuoteAnalyzer:
         'life': ['life', 'living', 'experience', 'journey', 'moment', 'time', 'day', 'world']
     }
     
+    STOP_WORDS = {'about', 'would', 'there', 'their', 'which', 'where', 'these', 'those'}
+    
+    def __init__(self):
+        # Document frequencies of every quote seen, for TF-IDF keyword ranking
+        self.corpus_stats = CorpusStats(store_keywords=False)
+    
     def analyze_sentiment(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment using TextBlob"""
         blob = TextBlob(text)
@@ -112,17 +121,30 @@ class QuoteAnalyzer:
         
         return best_category, confidence
     
-    def extract_keywords(self, text: str) -> List[str]:
-        """Extract important keywords from text"""
+    def keyword_terms(self, text: str) -> List[str]:
+        """Candidate keyword terms: longer words that are not stop words"""
         blob = TextBlob(text)
         words = [word.lower() for word in blob.words if len(word) > 4]
-        
-        # Remove common words
-        stop_words = {'about', 'would', 'there', 'their', 'which', 'where', 'these', 'those'}
-        keywords = [word for word in words if word not in stop_words]
-        
-        # Return top 5 unique keywords
-        return list(dict.fromkeys(keywords))[:5]
+        return [word for word in words if word not in self.STOP_WORDS]
+    
+    def add_quotes(self, quotes: List[Dict[str, Any]]):
+        """Count a collection's new or edited quotes in the corpus statistics"""
+        documents = []
+        for quote in quotes:
+            text = quote.get('text', '')
+            # Quotes without an id are keyed by their text
+            doc_id = quote.get('id')
+            if doc_id is None:
+                doc_id = text
+            fingerprint = zlib.crc32(text.encode('utf-8'))
+            if not self.corpus_stats.is_current(doc_id, fingerprint):
+                documents.append((doc_id, self.keyword_terms(text), fingerprint))
+        self.corpus_stats.add_documents(documents)
+    
+    def extract_keywords(self, text: str) -> List[str]:
+        """Extract important keywords from text, ranked by TF-IDF"""
+        # Return top 5 keywords
+        return self.corpus_stats.rank(self.keyword_terms(text), 5)
     
     def generate_insights(self, text: str, sentiment: str, category: str) -> List[str]:
         """Generate AI insights based on analysis"""
@@ -310,6 +332,8 @@ def search_quotes():
                 'confidence': 0
             })
         
+        analyzer.add_quotes(quotes)
+        
         # Simple keyword matching (can be enhanced)
         best_match = None
         best_score = 0
@@ -369,6 +393,8 @@ def random_quote():
         if not quotes:
             return jsonify({'error': 'No quotes available'}), 400
         
+        analyzer.add_quotes(quotes)
+        
         import random
         selected = random.choice(quotes)
         
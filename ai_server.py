@@ -12,13 +12,25 @@ Team:
 Project Mentor: Abhijeet Jhadhav
 """
 
+import time
+
+# Process start, for reporting time-to-ready after a warm or cold start
+STARTED_AT = time.perf_counter()
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS
 from textblob import TextBlob
 import re
 import nltk
-from collections import Counter
+from functools import lru_cache
 import random
+import os
+import sys
+import signal
+import argparse
+import zlib
+import atexit
+from dotenv import load_dotenv
 
 # Download required NLTK data
 try:
@@ -34,8 +46,45 @@ except LookupError:
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 
+from admission import AdmissionController
+from corpus_stats import CorpusStats
+from dedup import DuplicateIndex, collapse_duplicates
+from response_encoding import attach_quote, encode_response
+from search_index import SuggestIndex
+from sharding import ShardCoordinator
+from snapshot import StateStore
+
+load_dotenv()
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+
+# Allowed browser origins, comma separated (defaults to the Vite dev/preview servers)
+CORS_ORIGINS = os.environ.get('AI_CORS_ORIGINS', 'http://localhost:5173,http://127.0.0.1:5173,http://localhost:4173')
+CORS(app, origins=[origin.strip() for origin in CORS_ORIGINS.split(',')], expose_headers=['Retry-After'])
+
+# Request size, cost, rate and concurrency limits
+admission = AdmissionController()
+admission.install(app)
+
+# Typeahead index, filled incrementally from the quotes clients send us
+suggest_index = SuggestIndex()
+
+# Near-duplicate clusters over every quote we have seen
+duplicate_index = DuplicateIndex()
+
+# Document frequencies for TF-IDF keywords; per-quote keyword sets are
+# stored unless AI_STORE_KEYWORDS=0
+STORE_KEYWORDS = os.environ.get('AI_STORE_KEYWORDS', '1') != '0'
+corpus_stats = CorpusStats(store_keywords=STORE_KEYWORDS)
+
+# Sharding: a coordinator lists its worker URLs in AI_SHARDS; workers are
+# told their place with AI_SHARD_ID / AI_SHARD_COUNT (used for reporting)
+SHARD_URLS = [url.strip() for url in os.environ.get('AI_SHARDS', '').split(',') if url.strip()]
+shard_coordinator = (
+    ShardCoordinator(SHARD_URLS, max_concurrent=admission.config.max_concurrent) if SHARD_URLS else None
+)
+SHARD_ID = os.environ.get('AI_SHARD_ID')
+SHARD_COUNT = os.environ.get('AI_SHARD_COUNT')
 
 # Category keywords mapping
 CATEGORY_KEYWORDS = {
@@ -77,21 +126,142 @@ def analyze_sentiment(text):
         'polarity': round(polarity, 2)
     }
 
-def extract_keywords(text, max_keywords=5):
-    """Extract key words from text"""
-    # Convert to lowercase and remove punctuation
+def tokenize_text(text):
+    """Lowercase text, strip punctuation and split it into word tokens"""
     text_clean = re.sub(r'[^\w\s]', '', text.lower())
-    
-    # Tokenize
-    words = word_tokenize(text_clean)
-    
-    # Remove stopwords
-    stop_words = set(stopwords.words('english'))
-    keywords = [word for word in words if word not in stop_words and len(word) > 3]
-    
-    # Get most common keywords
-    word_freq = Counter(keywords)
-    return [word for word, _ in word_freq.most_common(max_keywords)]
+    return word_tokenize(text_clean)
+
+@lru_cache(maxsize=1)
+def get_stop_words():
+    """English stop words, loaded once"""
+    return frozenset(stopwords.words('english'))
+
+def keyword_terms(text):
+    """Candidate keyword terms of text: tokens without stop words or short words"""
+    stop_words = get_stop_words()
+    return [word for word in tokenize_text(text) if word not in stop_words and len(word) > 3]
+
+def extract_keywords(text, max_keywords=5):
+    """Extract key words from text, ranked by TF-IDF against the corpus"""
+    terms = keyword_terms(text)
+    if shard_coordinator is not None:
+        # A coordinator holds no documents; the shards' statistics are the corpus
+        return shard_coordinator.term_stats(terms).rank(terms, max_keywords)
+    return corpus_stats.rank(terms, max_keywords)
+
+def int_param(data, name, default, minimum, maximum):
+    """Read an integer request parameter, clamped to [minimum, maximum]
+
+    A missing or null parameter takes the default. Raises ValueError with a
+    client-facing message for non-integer values.
+    """
+    value = data.get(name)
+    if value is None:
+        return default
+    try:
+        if isinstance(value, float) or isinstance(value, bool):
+            raise ValueError
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer")
+    return min(max(value, minimum), maximum)
+
+def quote_key(quote):
+    """Stable identifier for a quote: its id, or its text when it has none"""
+    quote_id = quote.get('id')
+    return quote_id if quote_id is not None else quote.get('text', '')
+
+def text_fingerprint(quote):
+    """Cheap fingerprint of a quote's text, to notice edits of a known id"""
+    return zlib.crc32(quote.get('text', '').encode('utf-8'))
+
+def quote_keywords(quote, max_keywords=5):
+    """Keywords of a collection quote, reusing the stored set when there is one
+
+    Quotes are counted by ingest_quotes() beforehand; this only reads the
+    statistics, so every change to them stays in the journal.
+    """
+    keywords = corpus_stats.stored_keywords(quote_key(quote), max_keywords, text_fingerprint(quote))
+    if keywords is None:
+        keywords = corpus_stats.rank(keyword_terms(quote.get('text', '')), max_keywords)
+    return keywords
+
+def apply_ingest(quotes):
+    """Add quotes to the typeahead index and the corpus statistics"""
+    suggest_index.add_quotes(quotes)
+    corpus_stats.add_documents([
+        (quote_key(quote), keyword_terms(quote.get('text', '')), text_fingerprint(quote))
+        for quote in quotes
+    ])
+
+def apply_duplicates(quotes):
+    """Add quotes to the duplicate index"""
+    for quote in quotes:
+        duplicate_index.add(quote_key(quote), tokenize_text(quote.get('text', '')), text_fingerprint(quote))
+
+def record_change(kind, quotes):
+    """Apply a state change, journaling it when snapshots are enabled"""
+    if state_store is not None:
+        state_store.record(kind, quotes)
+    else:
+        STATE_HANDLERS[kind](quotes)
+
+def ingest_quotes(quotes):
+    """Add unseen or edited quotes to the typeahead index and the corpus statistics"""
+    changed = [
+        quote for quote in quotes
+        if not corpus_stats.is_current(quote_key(quote), text_fingerprint(quote))
+    ]
+    if changed:
+        record_change('ingest', changed)
+
+def index_duplicates(quotes):
+    """Add quotes to the duplicate index and return their cluster ids"""
+    changed = [
+        quote for quote in quotes
+        if not duplicate_index.is_current(quote_key(quote), text_fingerprint(quote))
+    ]
+    if changed:
+        record_change('duplicates', changed)
+    # Resolve after the whole batch, since later quotes can merge clusters
+    return [duplicate_index.cluster_of(quote_key(quote)) for quote in quotes]
+
+STATE_HANDLERS = {'ingest': apply_ingest, 'duplicates': apply_duplicates}
+
+def use_state_components(components):
+    """Swap in indexes and statistics restored from a snapshot"""
+    global suggest_index, duplicate_index, corpus_stats
+    suggest_index = components['suggest']
+    duplicate_index = components['duplicates']
+    corpus_stats = components['corpus']
+    corpus_stats.store_keywords = STORE_KEYWORDS
+
+# Snapshots of the indexes and statistics above, with a journal of changes
+# since the last one; set AI_STATE_DIR to an empty string to disable
+STATE_DIR = os.environ.get('AI_STATE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_state'))
+state_store = None
+
+def open_state_store():
+    """Restore state from STATE_DIR and keep snapshotting it
+
+    Called only by the process that serves requests: the state directory is
+    locked, and a second process using it fails here.
+    """
+    global state_store
+    if not STATE_DIR:
+        return
+    state_store = StateStore(
+        STATE_DIR,
+        {'suggest': suggest_index, 'duplicates': duplicate_index, 'corpus': corpus_stats},
+        STATE_HANDLERS,
+        interval=float(os.environ.get('AI_SNAPSHOT_INTERVAL', 300))
+    )
+    state_store.restore(STARTED_AT, on_load=use_state_components)
+    state_store.start_periodic()
+    atexit.register(state_store.snapshot)
+    # run_shards.py stops processes with SIGTERM, which would skip atexit;
+    # exit normally instead so the final snapshot is written
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
 def classify_category(text, keywords):
     """Classify quote into a category based on keywords"""
@@ -201,10 +371,43 @@ def calculate_overall_confidence(sentiment_confidence, category_confidence, text
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    result = {
         'status': 'healthy',
         'message': 'AI service is running',
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'indexes': {
+            'suggestQuotes': len(suggest_index),
+            'corpusDocuments': len(corpus_stats)
+        }
+    }
+    
+    if state_store is not None:
+        result['startup'] = state_store.startup
+    
+    if SHARD_ID is not None:
+        result['shard'] = {'id': int(SHARD_ID), 'count': int(SHARD_COUNT or 0)}
+    
+    if shard_coordinator is not None:
+        shards = shard_coordinator.health()
+        result['shards'] = shards
+        healthy = sum(1 for shard in shards if shard['status'] == 'healthy')
+        if healthy < len(shards):
+            result['status'] = 'degraded' if healthy else 'unhealthy'
+            result['message'] = f'{healthy} of {len(shards)} shards are healthy'
+    
+    return jsonify(result)
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Admission and index metrics"""
+    return jsonify({
+        'admission': admission.metrics(),
+        'indexes': {
+            'suggestQuotes': len(suggest_index),
+            'duplicateQuotes': len(duplicate_index),
+            'corpus': corpus_stats.stats()
+        },
+        'state': state_store.stats() if state_store is not None else None
     })
 
 @app.route('/api/analyze', methods=['POST'])
@@ -250,11 +453,60 @@ def analyze_quote():
             }
         }
         
-        return jsonify(result)
+        return encode_response(result)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def score_quotes(query, quotes, positions, query_keywords=None):
+    """Score quotes[position] for each position against the query
+
+    query_keywords default to the query's own keywords; a shard coordinator
+    sends the ones it extracted, so every shard scores the same keywords.
+    Returns the quotes that matched at all as {'index', 'score'} entries,
+    best first, ties in posting order.
+    """
+    if query_keywords is None:
+        query_keywords = extract_keywords(query)
+    query_keywords = set(query_keywords)
+    ranked = []
+    
+    for position in positions:
+        quote = quotes[position]
+        text = quote.get('text', '').lower()
+        author = quote.get('author', '').lower()
+        category = quote.get('category', '').lower()
+        
+        score = 0
+        
+        # Direct text match
+        if query in text:
+            score += 50
+        
+        # Keyword matches
+        matching_keywords = query_keywords & set(quote_keywords(quote))
+        score += len(matching_keywords) * 10
+        
+        # Category match
+        if query in category:
+            score += 30
+        
+        # Author match
+        if query in author:
+            score += 20
+        
+        # Partial word matches
+        for word in query.split():
+            if len(word) > 3 and word in text:
+                score += 5
+        
+        if score > 0:
+            ranked.append({'index': position, 'score': score})
+    
+    # Sort by score (stable, so equal scores keep posting order)
+    ranked.sort(key=lambda x: x['score'], reverse=True)
+    return ranked
+
 @app.route('/api/find-quote', methods=['POST'])
 def find_best_quote():
     """Find the best matching quote from a list based on query"""
@@ -269,65 +521,161 @@ def find_best_quote():
         if not quotes:
             return jsonify({'error': 'Quotes array is required'}), 400
         
-        # Score each quote
-        scored_quotes = []
-        query_keywords = extract_keywords(query)
+        try:
+            top_k = int_param(data, 'topK', 0, 0, 100)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        return_ids = data.get('returnIds', False)
+        query_keywords = data.get('queryKeywords')
+        if query_keywords is not None and not (
+            isinstance(query_keywords, list) and all(isinstance(keyword, str) for keyword in query_keywords)
+        ):
+            return jsonify({'error': "'queryKeywords' must be a list of strings"}), 400
         
-        for quote in quotes:
-            text = quote.get('text', '').lower()
-            author = quote.get('author', '').lower()
-            category = quote.get('category', '').lower()
-            
-            score = 0
-            
-            # Direct text match
-            if query in text:
-                score += 50
-            
-            # Keyword matches
-            quote_keywords = extract_keywords(text)
-            matching_keywords = set(query_keywords) & set(quote_keywords)
-            score += len(matching_keywords) * 10
-            
-            # Category match
-            if query in category:
-                score += 30
-            
-            # Author match
-            if query in author:
-                score += 20
-            
-            # Partial word matches
-            for word in query.split():
-                if len(word) > 3 and word in text:
-                    score += 5
-            
-            scored_quotes.append({
-                'quote': quote,
-                'score': score
-            })
-        
-        # Sort by score
-        scored_quotes.sort(key=lambda x: x['score'], reverse=True)
-        
-        if scored_quotes[0]['score'] == 0:
+        # Positions of the quotes to score; collapsing duplicates drops some
+        positions = list(range(len(quotes)))
+        collapse = bool(data.get('collapseDuplicates', False))
+        if collapse:
+            positions = collapse_duplicates(positions, index_duplicates(quotes))
+        
+        failed_shards = []
+        if shard_coordinator is not None:
+            # Each shard scores its own partition; only the best matches come back
+            candidates = [quotes[position] for position in positions]
+            gathered = shard_coordinator.find_matches(
+                query, extract_keywords(query), candidates, max(top_k, 1), quote_key
+            )
+            failed_shards = gathered['failed']
+            if failed_shards and len(failed_shards) == gathered['queried']:
+                return jsonify({'error': 'No shard answered', 'failedShards': failed_shards}), 503
+            ranked = [
+                {'index': positions[index], 'score': score}
+                for score, index in gathered['matches']
+            ]
+        else:
+            # Keep the indexes and statistics in sync with the collection being searched
+            ingest_quotes(quotes)
+            ranked = score_quotes(query, quotes, positions, query_keywords)
+        
+        if not ranked:
             # No good match, return random quote
             selected = random.choice(quotes)
             explanation = "No direct matches found. Here's a random inspirational quote."
             confidence = 40
+            match_score = 0
         else:
-            selected = scored_quotes[0]['quote']
-            explanation = f"This quote best matches your search for '{query}' with a relevance score of {scored_quotes[0]['score']}."
-            confidence = min(50 + scored_quotes[0]['score'], 95)
+            selected = quotes[ranked[0]['index']]
+            match_score = ranked[0]['score']
+            explanation = f"This quote best matches your search for '{query}' with a relevance score of {match_score}."
+            confidence = min(50 + match_score, 95)
         
         result = {
-            'selectedQuote': selected,
             'explanation': explanation,
             'confidence': confidence,
-            'matchScore': scored_quotes[0]['score'] if scored_quotes else 0
+            'matchScore': match_score
         }
+        attach_quote(result, selected, return_ids)
+        if top_k:
+            result['matches'] = [
+                attach_quote(dict(match), quotes[match['index']], return_ids, field='quote')
+                for match in ranked[:top_k]
+            ]
+        if collapse:
+            result['duplicatesCollapsed'] = len(quotes) - len(positions)
+        if failed_shards:
+            result['partial'] = True
+            result['failedShards'] = failed_shards
         
-        return jsonify(result)
+        return encode_response(result)
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/suggest', methods=['GET', 'POST'])
+def suggest():
+    """Return as-you-type suggestions for a partial query"""
+    try:
+        if request.method == 'POST':
+            data = request.get_json() or {}
+        else:
+            data = request.args
+        query = data.get('query', data.get('q', ''))
+        try:
+            limit = int_param(data, 'limit', 8, 1, 50)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Quotes posted alongside the query are added to the index
+        quotes = (data.get('quotes') or []) if request.method == 'POST' else []
+        
+        if shard_coordinator is not None:
+            gathered = shard_coordinator.suggest(query, limit, quotes, quote_key)
+            if gathered['failed'] and len(gathered['failed']) == gathered['queried']:
+                return jsonify({'error': 'No shard answered', 'failedShards': gathered['failed']}), 503
+            result = {
+                'query': query,
+                'suggestions': gathered['suggestions'],
+                'indexedQuotes': gathered['indexedQuotes']
+            }
+            if gathered['failed']:
+                result['partial'] = True
+                result['failedShards'] = gathered['failed']
+            return encode_response(result)
+        
+        ingest_quotes(quotes)
+        return encode_response({
+            'query': query,
+            'suggestions': suggest_index.suggest(query, limit),
+            'indexedQuotes': len(suggest_index)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/term-stats', methods=['POST'])
+def term_stats():
+    """Document count and term frequencies, summed by a shard coordinator"""
+    try:
+        data = request.get_json() or {}
+        terms = data.get('terms', [])
+        if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+            return jsonify({'error': "'terms' must be a list of strings"}), 400
+        
+        return encode_response({
+            'documents': len(corpus_stats),
+            'docFreq': corpus_stats.frequencies(terms)
+        })
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/duplicates', methods=['POST'])
+def find_duplicates():
+    """Group the posted quotes into near-duplicate clusters"""
+    try:
+        data = request.get_json()
+        quotes = data.get('quotes', [])
+        
+        if not quotes:
+            return jsonify({'error': 'Quotes array is required'}), 400
+        
+        cluster_ids = index_duplicates(quotes)
+        
+        groups = {}
+        for quote, cluster_id in zip(quotes, cluster_ids):
+            groups.setdefault(cluster_id, []).append(quote_key(quote))
+        
+        clusters = [
+            {'clusterId': cluster_id, 'quoteIds': quote_ids, 'size': len(quote_ids)}
+            for cluster_id, quote_ids in groups.items()
+            if len(quote_ids) > 1
+        ]
+        
+        return encode_response({
+            'clusters': clusters,
+            'totalQuotes': len(quotes),
+            'uniqueQuotes': len(groups)
+        })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -349,12 +697,12 @@ def random_insight():
         analysis = analyze_quote_internal(selected_quote.get('text', ''))
         
         result = {
-            'selectedQuote': selected_quote,
             'analysis': analysis,
             'explanation': f"Here's an inspiring {selected_quote.get('category', 'quote')} for you!"
         }
+        attach_quote(result, selected_quote, data.get('returnIds', False))
         
-        return jsonify(result)
+        return encode_response(result)
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -375,16 +723,36 @@ def analyze_quote_internal(text):
     }
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='AIB Quote Manager AI service')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('AI_PORT', 5001)))
+    parser.add_argument('--no-debug', action='store_true', help='Disable the Flask debugger and reloader')
+    args = parser.parse_args()
+    base_url = f"http://localhost:{args.port}"
+    
     print("=" * 60)
     print("🚀 AIB Quote Manager - AI Service Starting...")
     print("=" * 60)
-    print("📍 Server: http://localhost:5001")
-    print("🏥 Health: http://localhost:5001/api/health")
-    print("💡 Analyze: POST http://localhost:5001/api/analyze")
-    print("🔍 Search: POST http://localhost:5001/api/find-quote")
+    print(f"📍 Server: {base_url}")
+    print(f"🏥 Health: {base_url}/api/health")
+    print(f"💡 Analyze: POST {base_url}/api/analyze")
+    print(f"🔍 Search: POST {base_url}/api/find-quote")
+    print(f"⌨️  Suggest: GET/POST {base_url}/api/suggest")
+    print(f"🧬 Duplicates: POST {base_url}/api/duplicates")
+    print(f"📊 Metrics: GET {base_url}/api/metrics")
+    if shard_coordinator is not None:
+        print(f"🧩 Coordinating {len(shard_coordinator)} shards: {', '.join(SHARD_URLS)}")
+    if SHARD_ID is not None:
+        print(f"🧩 Shard {SHARD_ID} of {SHARD_COUNT}")
     print("=" * 60)
     print("👥 Team: Adnan (67), Chirayu (68), Abdul (69), Ralph (9)")
     print("🎓 Mentor: Abhijeet Jhadhav")
     print("=" * 60)
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # The debug reloader runs this script twice: a watcher process that only
+    # restarts the server, and the serving child, which it marks with
+    # WERKZEUG_RUN_MAIN. Only the process that serves keeps state.
+    debug = not args.no_debug
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        open_state_store()
+    
+    app.run(host='0.0.0.0', port=args.port, debug=debug, threaded=True)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark for response encoding on the analysis and search routes.
+
+Compares payload size and encode time of the default jsonify output with
+compact JSON, MessagePack, gzip/brotli and quote-id responses.
+
+Usage: python3 benchmarks/bench_encoding.py [batch_size]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from flask import Flask
+
+from response_encoding import attach_quote, brotli, compress_body, encode_body, msgpack
+
+QUOTE = {
+    'id': 42,
+    'text': 'The only way to do great work is to love what you do. If you have not found it yet, keep looking.',
+    'author': 'Steve Jobs',
+    'category': 'motivation',
+    'submitter': '0x8ba1f109551bD432803012645Ac136ddd64DBA72',
+    'timestamp': 1729324800,
+    'isActive': True
+}
+
+ANALYSIS = {
+    'sentiment': 'positive',
+    'sentimentEmoji': '😊',
+    'sentimentScore': 0.75,
+    'confidence': 87,
+    'category': 'motivation',
+    'keywords': ['great', 'work', 'love', 'found', 'looking'],
+    'insights': [
+        '✨ This quote has strong emotional resonance',
+        '🎯 Perfect for inspirational contexts',
+        '💫 Well-balanced length',
+        '🔥 High motivational impact'
+    ],
+    'recommendations': [
+        'Consider adding to daily motivation collection',
+        'Great for social media posts',
+        'Perfect for team building sessions'
+    ],
+    'analysis': {'wordCount': 20, 'characterCount': 98, 'polarity': 0.5}
+}
+
+
+def search_result(i, ids_only):
+    score = 30 + i % 60
+    result = {
+        'explanation': f"This quote best matches your search for 'great work' with a relevance score of {score}.",
+        'confidence': min(50 + score, 95),
+        'matchScore': score,
+        'analysis': ANALYSIS
+    }
+    return attach_quote(result, dict(QUOTE, id=i, timestamp=QUOTE['timestamp'] + i), ids_only)
+
+
+def measure(encode, payload, repeat, rounds=5):
+    """Return encoded size and best-of-rounds mean encode time in microseconds"""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            body = encode(payload)
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return len(body), best * 1e6
+
+
+def main():
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = Flask(__name__)
+
+    def jsonify_body(payload):
+        return app.json.response(payload).get_data()
+
+    def json_body(payload):
+        return encode_body(payload, 'application/json')
+
+    def msgpack_body(payload):
+        return encode_body(payload, 'application/msgpack')
+
+    variants = [('jsonify (baseline)', jsonify_body), ('compact json', json_body)]
+    variants.append(('json + gzip', lambda p: compress_body(json_body(p), 'gzip')))
+    if brotli is not None:
+        variants.append(('json + br', lambda p: compress_body(json_body(p), 'br')))
+    if msgpack is not None:
+        variants.append(('msgpack', msgpack_body))
+        variants.append(('msgpack + gzip', lambda p: compress_body(msgpack_body(p), 'gzip')))
+
+    single = search_result(0, False)
+    batch = [search_result(i, False) for i in range(batch_size)]
+    batch_ids = [search_result(i, True) for i in range(batch_size)]
+    payloads = [
+        ('single search response', single, single, 2000),
+        (f'{batch_size} search responses', batch, batch, 20),
+        (f'{batch_size} search responses, ids only', batch_ids, batch, 20),
+    ]
+
+    # Every variant is compared with jsonify of the full-quote payload
+    for label, payload, baseline, repeat in payloads:
+        print(label)
+        base_size, base_time = measure(jsonify_body, baseline, repeat)
+        for name, encode in variants:
+            size, micros = measure(encode, payload, repeat)
+            print(f"  {name:<20} {size:>9,} B ({size / base_size:6.1%})  "
+                  f"{micros:>10,.1f} us ({micros / base_time:6.1%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for snapshot-based warm restart.
+
+Compares rebuilding the service's indexes and statistics from the raw
+collection (cold start) with loading them from a snapshot (warm start),
+including replay of a journal tail written after the snapshot.
+
+Tokenization uses a regex stand-in for NLTK so the benchmark runs without
+NLTK data; the real cold path is slower still.
+
+Usage: python3 benchmarks/bench_restart.py [quote_count]
+"""
+
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from bench_suggest import make_quotes
+from corpus_stats import CorpusStats
+from dedup import DuplicateIndex
+from search_index import SuggestIndex
+from snapshot import StateStore
+
+JOURNAL_TAIL = 100
+
+
+def tokenize(text):
+    return re.sub(r'[^\w\s]', '', text.lower()).split()
+
+
+def make_store(directory):
+    components = {'suggest': SuggestIndex(), 'duplicates': DuplicateIndex(), 'corpus': CorpusStats()}
+
+    def ingest(quotes):
+        components['suggest'].add_quotes(quotes)
+        components['corpus'].add_documents([
+            (quote['id'], [word for word in tokenize(quote['text']) if len(word) > 3], None)
+            for quote in quotes
+        ])
+        for quote in quotes:
+            components['duplicates'].add(quote['id'], tokenize(quote['text']))
+
+    return StateStore(directory, components, {'ingest': ingest})
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    quotes = make_quotes(count + JOURNAL_TAIL, random.Random(42))
+    base, tail = quotes[:count], quotes[count:]
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = make_store(directory)
+        store.restore(time.perf_counter())
+
+        # A cold start rebuilds everything from the collection, unjournaled
+        start = time.perf_counter()
+        for i in range(0, count, 1000):
+            store.handlers['ingest'](base[i:i + 1000])
+        cold_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store.snapshot(force=True)
+        snapshot_seconds = time.perf_counter() - start
+        snapshot_bytes = store.last_snapshot['bytes']
+        locked_seconds = store.last_snapshot['lockedMs'] / 1000
+
+        # Changes after the checkpoint are only in the journal
+        for quote in tail:
+            store.record('ingest', [quote])
+        store.close()
+
+        restarted = make_store(directory)
+        startup = restarted.restore(time.perf_counter())
+        warm_seconds = startup['timeToReadyMs'] / 1000
+        assert len(restarted.components['suggest']) == count + JOURNAL_TAIL
+
+    print(f"Quotes:            {count:,} (+{JOURNAL_TAIL} journaled after the snapshot)")
+    print(f"Cold rebuild:      {cold_seconds:8.2f}s")
+    print(f"Snapshot write:    {snapshot_seconds:8.2f}s ({snapshot_bytes / 1e6:.1f} MB, "
+          f"record() blocked {locked_seconds:.2f}s)")
+    print(f"Warm restart:      {warm_seconds:8.2f}s "
+          f"(load {startup['snapshotLoadMs'] / 1000:.2f}s, replay {startup['replayedEntries']} entries "
+          f"in {startup['replayMs'] / 1000:.2f}s)")
+    print(f"Speed-up:          {cold_seconds / warm_seconds:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the /api/suggest index.
+
+Builds a SuggestIndex over a synthetic collection and reports lookup
+latency percentiles for prefix and typo queries.
+
+Usage: python3 benchmarks/bench_suggest.py [quote_count]
+"""
+
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from search_index import SuggestIndex
+
+WORDS = [
+    'life', 'love', 'success', 'wisdom', 'courage', 'dream', 'journey', 'happiness',
+    'knowledge', 'freedom', 'patience', 'change', 'future', 'moment', 'creativity',
+    'leadership', 'strength', 'purpose', 'kindness', 'truth', 'passion', 'vision',
+]
+AUTHORS = ['Albert Einstein', 'Maya Angelou', 'Marcus Aurelius', 'Steve Jobs', 'Confucius']
+CATEGORIES = ['motivation', 'life', 'success', 'wisdom', 'happiness', 'love', 'inspiration']
+
+
+def make_quotes(count, rng):
+    # Random suffixes give the index a realistically large vocabulary
+    vocabulary = WORDS + [word + suffix for word in WORDS for suffix in ('s', 'ful', 'less', 'ing', 'ed')]
+    vocabulary += [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 10)))
+                   for _ in range(20000)]
+    return [{
+        'id': i,
+        'text': ' '.join(rng.choice(vocabulary) for _ in range(rng.randint(6, 20))),
+        'author': rng.choice(AUTHORS),
+        'category': rng.choice(CATEGORIES)
+    } for i in range(count)]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * pct / 100), len(ordered) - 1)]
+
+
+def run_queries(index, queries):
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        index.suggest(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = random.Random(42)
+    quotes = make_quotes(count, rng)
+
+    index = SuggestIndex()
+    start = time.perf_counter()
+    index.add_quotes(quotes)
+    build_seconds = time.perf_counter() - start
+
+    prefixes = [word[:rng.randint(1, len(word))] for word in rng.choices(WORDS, k=2000)]
+    typos = []
+    for word in rng.choices(WORDS, k=500):
+        i = rng.randrange(len(word))
+        typos.append(word[:i] + rng.choice('xqz') + word[i + 1:])
+
+    print(f"Indexed {count} quotes in {build_seconds:.2f}s "
+          f"({count / build_seconds:,.0f} quotes/s)")
+    for label, queries in (('prefix', prefixes), ('typo', typos)):
+        samples = run_queries(index, queries)
+        print(f"{label:>6}: p50={statistics.median(samples):.3f}ms "
+              f"p95={percentile(samples, 95):.3f}ms p99={percentile(samples, 99):.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
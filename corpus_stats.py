@@ -0,0 +1,129 @@
+"""
+AIB Quote Manager - Corpus Statistics
+Document frequencies for TF-IDF keyword ranking.
+
+Quotes are short, so raw term counts are almost always 1 and say nothing
+about which words matter. CorpusStats keeps the number of quotes each term
+appears in, updated incrementally as quotes are seen, and ranks a text's
+candidate terms by TF-IDF against it. Ranking costs one dictionary lookup
+per candidate term and ties are broken by position, so results are
+deterministic for a given corpus.
+
+Optionally the ranked keywords of every quote are stored, so searches can
+reuse them instead of re-tokenizing the collection.
+
+Documents are keyed by id and carry a fingerprint of their text. A known id
+arriving with a new fingerprint (an edited quote) has its old terms
+uncounted and its new ones counted, and its stored keywords are recomputed.
+"""
+
+import math
+import threading
+import zlib
+from collections import Counter
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from snapshot import SnapshotComponent
+
+
+class CorpusStats(SnapshotComponent):
+    """Incrementally maintained document-frequency table"""
+
+    def __init__(self, store_keywords: bool = True):
+        self.store_keywords = store_keywords
+        self.doc_count = 0
+        self.doc_freq = Counter()
+        self.documents = {}  # document id -> (fingerprint, distinct terms)
+        self.keywords = {}  # document id -> (keywords, complete)
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.doc_count
+
+    def is_current(self, doc_id: Hashable, fingerprint: int) -> bool:
+        """True if doc_id is counted with this text fingerprint"""
+        document = self.documents.get(doc_id)
+        return document is not None and document[0] == fingerprint
+
+    def add_document(self, doc_id: Hashable, terms: List[str], fingerprint: Optional[int] = None) -> bool:
+        """Count a document's distinct terms once; False if already counted
+
+        fingerprint identifies the document's text (a hash of its terms by
+        default). A known id with a new fingerprint replaces the old terms.
+        """
+        if fingerprint is None:
+            fingerprint = zlib.crc32(' '.join(terms).encode('utf-8'))
+        distinct = frozenset(terms)
+        with self.lock:
+            previous = self.documents.get(doc_id)
+            if previous is not None and previous[0] == fingerprint:
+                return False
+            if previous is None:
+                self.doc_count += 1
+            else:
+                self.doc_freq.subtract(previous[1])
+                for term in previous[1]:
+                    if self.doc_freq[term] <= 0:
+                        del self.doc_freq[term]
+                self.keywords.pop(doc_id, None)
+            self.documents[doc_id] = (fingerprint, distinct)
+            self.doc_freq.update(distinct)
+        return True
+
+    def add_documents(self, documents: List[Tuple[Hashable, List[str], Optional[int]]], limit: int = 5) -> int:
+        """Count a batch of (id, terms, fingerprint) documents, then store their keywords if enabled
+
+        Keywords are ranked only after the whole batch is counted, so every
+        document is scored against the same statistics.
+        """
+        added = [
+            (doc_id, terms) for doc_id, terms, fingerprint in documents
+            if self.add_document(doc_id, terms, fingerprint)
+        ]
+        if self.store_keywords:
+            for doc_id, terms in added:
+                keywords = self.rank(terms, limit)
+                self.keywords[doc_id] = (keywords, len(keywords) < limit)
+        return len(added)
+
+    def idf(self, term: str) -> float:
+        """Smoothed inverse document frequency; unseen terms score highest"""
+        return math.log((1 + self.doc_count) / (1 + self.doc_freq.get(term, 0))) + 1
+
+    def rank(self, terms: List[str], limit: int = 5) -> List[str]:
+        """Return the top terms of a document by TF-IDF"""
+        counts = Counter(terms)
+        first_seen = {}
+        for position, term in enumerate(terms):
+            first_seen.setdefault(term, position)
+
+        scored = [(-count * self.idf(term), first_seen[term], term) for term, count in counts.items()]
+        scored.sort()
+        return [term for _, _, term in scored[:limit]]
+
+    def stored_keywords(self, doc_id: Hashable, limit: int = 5,
+                        fingerprint: Optional[int] = None) -> Optional[List[str]]:
+        """Return a document's stored keywords, or None if they must be computed
+
+        With a fingerprint, keywords stored for a different text are ignored.
+        """
+        stored = self.keywords.get(doc_id)
+        if stored is None:
+            return None
+        if fingerprint is not None and not self.is_current(doc_id, fingerprint):
+            return None
+        keywords, complete = stored
+        if len(keywords) < limit and not complete:
+            return None
+        return keywords[:limit]
+
+    def frequencies(self, terms: List[str]) -> Dict[str, int]:
+        """Document frequency of each term"""
+        return {term: self.doc_freq.get(term, 0) for term in terms}
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'documents': self.doc_count,
+            'terms': len(self.doc_freq),
+            'storedKeywordSets': len(self.keywords)
+        }
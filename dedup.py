@@ -0,0 +1,213 @@
+"""
+AIB Quote Manager - Near-Duplicate Detection
+MinHash signatures with an LSH band index for finding near-duplicate quotes.
+
+Quotes are reduced to word shingles of their normalized tokens, and each
+shingle set is summarised by a MinHash signature. Signatures are split into
+bands; quotes sharing any band bucket become candidates, which are confirmed
+by their estimated Jaccard similarity. Confirmed pairs are merged into
+clusters, so lookups never compare a quote against the whole collection.
+"""
+
+import random
+import threading
+import zlib
+from collections import defaultdict
+from typing import Any, Dict, Hashable, List, Optional
+
+from snapshot import SnapshotComponent
+
+# Signature layout: BANDS * ROWS hash functions. With 16 bands of 4 rows,
+# pairs above roughly 0.5 Jaccard similarity are very likely to collide.
+BANDS = 16
+ROWS = 4
+
+SHINGLE_SIZE = 2
+DEFAULT_THRESHOLD = 0.8
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingles(tokens: List[str], size: int = SHINGLE_SIZE) -> set:
+    """Return word shingles; quotes shorter than size become one shingle"""
+    if len(tokens) < size:
+        return {' '.join(tokens)} if tokens else set()
+    return {' '.join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+class MinHasher:
+    """Deterministic MinHash over string shingles"""
+
+    def __init__(self, num_perm: int = BANDS * ROWS, seed: int = 1):
+        rng = random.Random(seed)
+        self.params = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(num_perm)
+        ]
+
+    def signature(self, shingle_set: set) -> tuple:
+        hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingle_set]
+        if not hashes:
+            return tuple([_MAX_HASH] * len(self.params))
+        return tuple(
+            min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH
+            for a, b in self.params
+        )
+
+
+def estimate_similarity(sig_a: tuple, sig_b: tuple) -> float:
+    """Fraction of matching MinHash slots, an estimate of Jaccard similarity"""
+    matches = sum(1 for a, b in zip(sig_a, sig_b) if a == b)
+    return matches / len(sig_a)
+
+
+class DuplicateIndex(SnapshotComponent):
+    """Incremental LSH index grouping near-duplicate quotes into clusters"""
+
+    # Band buckets are re-derived from the signatures
+    derived_fields = ('buckets',)
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self.hasher = MinHasher()
+        self.signatures = {}  # quote id -> signature, None for quotes without words
+        self.buckets = defaultdict(list)  # (band, band hash) -> quote ids
+        self.parent = {}  # union-find over quote ids
+        self.members = {}  # cluster root -> quote ids in the cluster
+        self.order = {}  # quote id -> insertion sequence
+        self.next_order = 0
+        self.fingerprints = {}  # quote id -> fingerprint of its indexed text
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def rebuild_derived(self):
+        self.buckets = defaultdict(list)
+        for quote_id in sorted(self.signatures, key=self.order.get):
+            if self.signatures[quote_id] is None:
+                continue
+            for key in self._band_keys(self.signatures[quote_id]):
+                self.buckets[key].append(quote_id)
+
+    def is_current(self, quote_id: Hashable, fingerprint: int) -> bool:
+        """True if quote_id is indexed with this text fingerprint"""
+        return self.fingerprints.get(quote_id) == fingerprint
+
+    def add(self, quote_id: Hashable, tokens: List[str], fingerprint: Optional[int] = None) -> Hashable:
+        """Index a quote's tokens and return the id of its cluster
+
+        fingerprint identifies the quote's text (a hash of its tokens by
+        default). Adding a known id with a new fingerprint, as happens when a
+        quote is edited, re-indexes it and re-checks its old cluster.
+        """
+        if fingerprint is None:
+            fingerprint = zlib.crc32(' '.join(tokens).encode('utf-8'))
+        with self.lock:
+            if self.fingerprints.get(quote_id) == fingerprint:
+                return self._find(quote_id)
+
+        shingle_set = shingles(tokens)
+        # A quote with no words (empty or only punctuation) resembles nothing;
+        # it gets a cluster of its own and stays out of the LSH buckets
+        signature = self.hasher.signature(shingle_set) if shingle_set else None
+
+        with self.lock:
+            if self.fingerprints.get(quote_id) == fingerprint:
+                return self._find(quote_id)
+            if quote_id in self.signatures:
+                self._remove(quote_id)
+            self._insert(quote_id, signature)
+            self.fingerprints[quote_id] = fingerprint
+            return self._find(quote_id)
+
+    def _band_keys(self, signature: tuple):
+        return [(band, signature[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+    def _insert(self, quote_id: Hashable, signature: tuple):
+        self.signatures[quote_id] = signature
+        self.parent[quote_id] = quote_id
+        self.members[quote_id] = [quote_id]
+        self.order[quote_id] = self.next_order
+        self.next_order += 1
+        if signature is None:
+            return
+
+        candidates = set()
+        for key in self._band_keys(signature):
+            candidates.update(self.buckets[key])
+            self.buckets[key].append(quote_id)
+
+        for other in candidates:
+            if estimate_similarity(signature, self.signatures[other]) >= self.threshold:
+                self._union(quote_id, other)
+
+    def _remove(self, quote_id: Hashable):
+        """Drop a quote and split what is left of its cluster back apart"""
+        group = [member for member in self.members.pop(self._find(quote_id)) if member != quote_id]
+        signature = self.signatures.pop(quote_id)
+        for key in self._band_keys(signature) if signature is not None else ():
+            self.buckets[key].remove(quote_id)
+            if not self.buckets[key]:
+                del self.buckets[key]
+        del self.parent[quote_id]
+        del self.order[quote_id]
+        del self.fingerprints[quote_id]
+
+        # The removed quote may have been the only link between the others,
+        # so re-link them from their pairwise similarities
+        group.sort(key=self.order.get)
+        for member in group:
+            self.parent[member] = member
+            self.members[member] = [member]
+        for i, member in enumerate(group):
+            for other in group[:i]:
+                if estimate_similarity(self.signatures[member], self.signatures[other]) >= self.threshold:
+                    self._union(member, other)
+
+    def cluster_of(self, quote_id: Hashable) -> Optional[Hashable]:
+        """Return the cluster id of an indexed quote, or None"""
+        with self.lock:
+            if quote_id not in self.parent:
+                return None
+            return self._find(quote_id)
+
+    def clusters(self, quote_ids: Optional[List[Hashable]] = None) -> Dict[Hashable, List[Hashable]]:
+        """Group quote ids (all indexed ones by default) by cluster id"""
+        with self.lock:
+            groups = defaultdict(list)
+            for quote_id in (self.parent if quote_ids is None else quote_ids):
+                if quote_id in self.parent:
+                    groups[self._find(quote_id)].append(quote_id)
+            return dict(groups)
+
+    def _find(self, quote_id: Hashable) -> Hashable:
+        root = quote_id
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression
+        while self.parent[quote_id] != root:
+            self.parent[quote_id], quote_id = root, self.parent[quote_id]
+        return root
+
+    def _union(self, a: Hashable, b: Hashable):
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a == root_b:
+            return
+        # The earliest indexed quote stays the cluster representative
+        if self.order[root_a] > self.order[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.members[root_a].extend(self.members.pop(root_b))
+
+
+def collapse_duplicates(quotes: List[Any], cluster_ids: List[Hashable]) -> List[Any]:
+    """Keep the first quote (or quote position) seen from each cluster, preserving order"""
+    seen = set()
+    collapsed = []
+    for quote, cluster_id in zip(quotes, cluster_ids):
+        if cluster_id not in seen:
+            seen.add(cluster_id)
+            collapsed.append(quote)
+    return collapsed
@@ -0,0 +1,84 @@
+"""
+AIB Quote Manager - Response Encoding
+Content negotiation for the analysis and search routes.
+
+Clients that send `Accept: application/msgpack` get MessagePack instead of
+JSON, and large bodies are compressed with brotli or gzip according to
+`Accept-Encoding`. msgpack and brotli are optional: without them the
+service falls back to JSON and gzip.
+"""
+
+import gzip
+import json
+
+from flask import Response, request
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+# Bodies smaller than this are sent uncompressed; the headers would eat the gain
+COMPRESSION_MIN_BYTES = 1024
+
+
+def encode_body(payload, mimetype):
+    """Serialize payload as MessagePack or compact JSON"""
+    if mimetype in MSGPACK_MIMETYPES:
+        return msgpack.packb(payload, use_bin_type=True)
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def compress_body(body, coding):
+    """Compress body with the given content coding"""
+    if coding == 'br':
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=5)
+
+
+def negotiate_mimetype():
+    """Pick MessagePack when the client asks for it and it is available"""
+    if msgpack is None:
+        return 'application/json'
+    best = request.accept_mimetypes.best_match(('application/json',) + MSGPACK_MIMETYPES)
+    return best if best in MSGPACK_MIMETYPES else 'application/json'
+
+
+def negotiate_coding():
+    """Pick brotli or gzip from Accept-Encoding, or None"""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def encode_response(payload, status=200):
+    """Build a response for payload honouring Accept and Accept-Encoding"""
+    mimetype = negotiate_mimetype()
+    body = encode_body(payload, mimetype)
+
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    coding = negotiate_coding()
+    if coding and len(body) >= COMPRESSION_MIN_BYTES:
+        body = compress_body(body, coding)
+        headers['Content-Encoding'] = coding
+
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
+
+
+def attach_quote(result, quote, ids_only, field='selectedQuote'):
+    """Add a quote to result under field, or only its id (as fieldId) when ids_only is set"""
+    if ids_only and quote is not None and quote.get('id') is not None:
+        result[f'{field}Id'] = quote['id']
+    else:
+        result[field] = quote
+    return result
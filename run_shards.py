@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+AIB Quote Manager - Local Shard Cluster
+Starts N ai_server shard workers and a coordinator on one machine.
+
+Usage: python3 run_shards.py [--shards 3] [--port 5001] [--worker-port 5101]
+
+The coordinator listens on --port and fans /api/find-quote and
+/api/suggest out to workers on consecutive ports from --worker-port. It
+keeps no per-quote indexes of its own, so its memory does not grow with
+the collection (except the duplicate index, when searches ask to
+collapse duplicates). Per-client rate limits are
+enforced by the coordinator; workers only see coordinator traffic, so
+their per-client budget is lifted. Each process keeps its snapshots in
+its own subdirectory of AI_STATE_DIR.
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import time
+
+SERVER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_server.py')
+
+# Every process snapshots into its own subdirectory of this
+STATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ai_state')
+
+
+def state_dir(name):
+    """Snapshot directory for one process; empty when snapshots are disabled"""
+    base = os.environ.get('AI_STATE_DIR', STATE_DIR)
+    return os.path.join(base, name) if base else ''
+
+
+def start(port, env):
+    return subprocess.Popen([sys.executable, SERVER, '--port', str(port), '--no-debug'], env=env)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--shards', type=int, default=3)
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--worker-port', type=int, default=5101)
+    args = parser.parse_args()
+
+    processes = []
+    worker_urls = []
+    for shard in range(args.shards):
+        port = args.worker_port + shard
+        env = dict(os.environ,
+                   AI_SHARD_ID=str(shard),
+                   AI_SHARD_COUNT=str(args.shards),
+                   AI_RATE_REFILL_PER_SECOND='1000000',
+                   AI_RATE_BUCKET_CAPACITY='1000000')
+        env.pop('AI_SHARDS', None)
+        env['AI_STATE_DIR'] = state_dir(f'shard-{shard}')
+        processes.append(start(port, env))
+        worker_urls.append(f'http://localhost:{port}')
+
+    env = dict(os.environ, AI_SHARDS=','.join(worker_urls), AI_STATE_DIR=state_dir('coordinator'))
+    processes.append(start(args.port, env))
+
+    def shutdown(*_):
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+        sys.exit(0)
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+
+    while all(process.poll() is None for process in processes):
+        time.sleep(1)
+    print('A shard process exited; stopping the cluster')
+    shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,309 @@
+"""
+AIB Quote Manager - Suggestion Index
+In-memory prefix trie and trigram index used for as-you-type suggestions.
+
+The trie answers prefix lookups over quote terms, authors and categories.
+Every trie node keeps a short list of its most frequent completions, so a
+lookup only walks the prefix and never scans the subtree. The trigram index
+provides typo tolerance: candidate terms sharing trigrams with the query are
+verified with a bounded Levenshtein distance.
+
+Both structures are updated incrementally as quotes are added. An edited
+quote has the terms it lost uncounted, and the trie caches along their
+paths are recomputed from the caches one level below.
+"""
+
+import re
+import threading
+from collections import defaultdict
+from functools import partial
+from typing import Any, Dict, List, Optional, Tuple
+
+from snapshot import SnapshotComponent
+
+# Number of completions cached on every trie node
+NODE_CACHE_SIZE = 10
+
+# Terms shorter than this are not worth suggesting; longer ones (URLs,
+# hashes) would only deepen the trie
+MIN_TERM_LENGTH = 3
+MAX_TERM_LENGTH = 40
+
+
+def normalize_term(value: str) -> str:
+    """Lowercase a term and collapse punctuation and whitespace"""
+    value = re.sub(r'[^\w\s]', ' ', value.lower())
+    return ' '.join(value.split())
+
+
+def trigrams(term: str) -> set:
+    """Return the padded character trigrams of a term"""
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def bounded_edit_distance(a: str, b: str, max_distance: int) -> Optional[int]:
+    """Levenshtein distance between a and b, or None if above max_distance"""
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        row_min = i
+        for j, char_b in enumerate(b, 1):
+            cost = 0 if char_a == char_b else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            current.append(value)
+            row_min = min(row_min, value)
+        # Every later row is at least this large, so stop early
+        if row_min > max_distance:
+            return None
+        previous = current
+
+    distance = previous[-1]
+    return distance if distance <= max_distance else None
+
+
+class _TrieNode:
+    __slots__ = ('children', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.top = []  # [(weight, key)] sorted by weight, highest first
+
+
+class PrefixTrie:
+    """Prefix trie with per-node top-k completion caches"""
+
+    def __init__(self, cache_size: int = NODE_CACHE_SIZE):
+        self.root = _TrieNode()
+        self.cache_size = cache_size
+
+    def update(self, key: str, weight: int):
+        """Insert key, or raise its weight, refreshing caches along its path"""
+        node = self.root
+        self._refresh(node, key, weight)
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            self._refresh(node, key, weight)
+
+    def _refresh(self, node: _TrieNode, key: str, weight: int):
+        top = node.top
+        # Weights only grow, so a key at or below the cache floor is not cached
+        if len(top) >= self.cache_size and weight <= top[-1][0]:
+            return
+        for i, (_, cached_key) in enumerate(top):
+            if cached_key == key:
+                del top[i]
+                break
+        top.append((weight, key))
+        top.sort(key=lambda entry: (-entry[0], entry[1]))
+        del top[self.cache_size:]
+
+    def refresh_path(self, key: str, weights: Dict[str, int]):
+        """Recompute the caches along key's path after its weight dropped
+
+        Each node's cache is rebuilt, deepest first, from its children's
+        caches and the key ending at the node. Nodes left with nothing to
+        suggest are pruned.
+        """
+        path = [self.root]
+        for char in key:
+            node = path[-1].children.get(char)
+            if node is None:
+                break
+            path.append(node)
+
+        for depth in range(len(path) - 1, -1, -1):
+            node = path[depth]
+            prefix = key[:depth]
+            entries = [entry for child in node.children.values() for entry in child.top]
+            if prefix in weights:
+                entries.append((weights[prefix], prefix))
+            entries.sort(key=lambda entry: (-entry[0], entry[1]))
+            node.top = entries[:self.cache_size]
+            if depth and not node.top and not node.children:
+                del path[depth - 1].children[key[depth - 1]]
+
+    @classmethod
+    def from_weights(cls, weights: Dict[str, int], cache_size: int = NODE_CACHE_SIZE) -> 'PrefixTrie':
+        """Build a trie of final weights in one pass
+
+        Keys are inserted heaviest first, so every node's cache is simply the
+        first cache_size keys that reach it.
+        """
+        trie = cls(cache_size)
+        for key, weight in sorted(weights.items(), key=lambda item: (-item[1], item[0])):
+            entry = (weight, key)
+            node = trie.root
+            if len(node.top) < cache_size:
+                node.top.append(entry)
+            for char in key:
+                child = node.children.get(char)
+                if child is None:
+                    child = node.children[char] = _TrieNode()
+                node = child
+                if len(node.top) < cache_size:
+                    node.top.append(entry)
+        return trie
+
+    def complete(self, prefix: str, limit: int) -> List[Tuple[int, str]]:
+        """Return up to limit (weight, key) completions of prefix"""
+        node = self.root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return node.top[:limit]
+
+
+class SuggestIndex(SnapshotComponent):
+    """Typeahead index over quote terms, authors and categories"""
+
+    # The trie holds nothing but the term counts, arranged for lookup
+    derived_fields = ('trie',)
+
+    def __init__(self):
+        self.trie = PrefixTrie()
+        self.grams = defaultdict(partial(defaultdict, set))  # length -> trigram -> keys
+        self.counts = {}  # key -> number of quotes containing it
+        self.kinds = {}  # key -> 'term' | 'author' | 'category'
+        self.quotes = {}  # quote id -> {key: kind} indexed for it
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.quotes)
+
+    def rebuild_derived(self):
+        self.trie = PrefixTrie.from_weights(self.counts)
+
+    def add_quote(self, quote: Dict[str, Any]) -> bool:
+        """Index a quote; returns False if it is already indexed as it is
+
+        A known id whose terms changed, as happens when a quote is edited,
+        has the terms it lost uncounted and the new ones counted.
+        """
+        quote_id = quote.get('id')
+        key = quote_id if quote_id is not None else quote.get('text', '')
+
+        entries = {}
+        for word in normalize_term(quote.get('text', '')).split():
+            if MIN_TERM_LENGTH <= len(word) <= MAX_TERM_LENGTH and not word.isdigit():
+                entries[word] = 'term'
+        for field in ('category', 'author'):
+            value = normalize_term(quote.get(field) or '')
+            # Index the whole phrase and each word, so 'jobs' finds 'steve jobs'
+            for term in [value] + value.split():
+                if MIN_TERM_LENGTH <= len(term) <= MAX_TERM_LENGTH:
+                    entries[term] = field
+
+        with self.lock:
+            previous = self.quotes.get(key)
+            if previous == entries:
+                return False
+            self.quotes[key] = entries
+            if previous:
+                for term in previous.keys() - entries.keys():
+                    self._remove_term(term)
+                entries = {term: kind for term, kind in entries.items() if term not in previous}
+            for term, kind in entries.items():
+                self._add_term(term, kind)
+        return True
+
+    def add_quotes(self, quotes: List[Dict[str, Any]]) -> int:
+        """Index a batch of quotes and return how many were new or changed"""
+        return sum(1 for quote in quotes if self.add_quote(quote))
+
+    def _add_term(self, term: str, kind: str):
+        count = self.counts.get(term, 0) + 1
+        self.counts[term] = count
+        # Authors and categories outrank plain words with the same prefix
+        if self.kinds.get(term) in (None, 'term'):
+            self.kinds[term] = kind
+        if count == 1:
+            postings = self.grams[len(term)]
+            for gram in trigrams(term):
+                postings[gram].add(term)
+        self.trie.update(term, count)
+
+    def _remove_term(self, term: str):
+        count = self.counts[term] - 1
+        if count:
+            self.counts[term] = count
+        else:
+            del self.counts[term]
+            del self.kinds[term]
+            postings = self.grams[len(term)]
+            for gram in trigrams(term):
+                postings[gram].discard(term)
+                if not postings[gram]:
+                    del postings[gram]
+        self.trie.refresh_path(term, self.counts)
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict[str, Any]]:
+        """Return completions of query, or fuzzy matches if there are none
+
+        The whole input is tried as a prefix first (so 'john len' completes
+        the author 'john lennon'). Otherwise only its last word is completed
+        and the suggestions keep the words typed before it.
+        """
+        prefix = normalize_term(query)
+        if not prefix:
+            return []
+
+        with self.lock:
+            results = self._lookup(prefix, limit)
+            head, _, last = prefix.rpartition(' ')
+            if not results and head:
+                results = [
+                    dict(entry, text=f"{head} {entry['text']}")
+                    for entry in self._lookup(last, limit)
+                ]
+        return results
+
+    def _lookup(self, prefix: str, limit: int) -> List[Dict[str, Any]]:
+        results = [
+            self._entry(term, weight, 0)
+            for weight, term in self.trie.complete(prefix, limit)
+        ]
+        if not results and len(prefix) >= MIN_TERM_LENGTH:
+            results = [
+                self._entry(term, self.counts[term], distance)
+                for term, distance in self._fuzzy(prefix, limit)
+            ]
+        return results
+
+    def _fuzzy(self, query: str, limit: int) -> List[Tuple[str, int]]:
+        max_distance = 1 if len(query) < 8 else 2
+        query_grams = trigrams(query)
+        # Each edit changes at most three trigrams
+        min_shared = max(1, len(query_grams) - 3 * max_distance)
+
+        # Count shared trigrams among terms whose length is within range
+        shared = defaultdict(int)
+        for length in range(len(query) - max_distance, len(query) + max_distance + 1):
+            postings = self.grams.get(length)
+            if not postings:
+                continue
+            for gram in query_grams:
+                for term in postings.get(gram, ()):
+                    shared[term] += 1
+
+        matches = []
+        for term, count in shared.items():
+            if count < min_shared:
+                continue
+            distance = bounded_edit_distance(query, term, max_distance)
+            if distance is not None:
+                matches.append((distance, -self.counts[term], term))
+        matches.sort()
+        return [(term, distance) for distance, _, term in matches[:limit]]
+
+    def _entry(self, term: str, weight: int, distance: int) -> Dict[str, Any]:
+        return {
+            'text': term,
+            'type': self.kinds[term],
+            'count': weight,
+            'distance': distance
+        }
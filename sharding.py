@@ -0,0 +1,215 @@
+"""
+AIB Quote Manager - Sharded Search
+Scatter-gather coordination over AI service worker processes.
+
+Quotes are partitioned across shards by a stable hash of their id, so the
+same quote always lands on the same worker and is indexed and analyzed
+there only. The coordinator sends every shard its partition of a search,
+asks for its top matches, and merges them by score.
+
+The coordinator holds no per-quote search state, so the collection never
+has to fit in one process. Typeahead requests are fanned out the same way
+and their suggestions merged. Keywords of a query (or of a text to
+analyze) are ranked against document frequencies summed from the shards on
+demand. That costs a small extra request per shard instead of a copy of
+every quote's terms on the coordinator. Each shard is sent the query
+keywords, so all shards score the same ones; quote keywords are ranked
+against each shard's own statistics.
+
+Workers are ordinary ai_server processes; see run_shards.py for starting a
+local cluster.
+"""
+
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+from corpus_stats import CorpusStats
+
+DEFAULT_TIMEOUT = 10.0
+
+
+def shard_for(key: Any, shard_count: int) -> int:
+    """Stable shard number for a quote key"""
+    return zlib.crc32(str(key).encode('utf-8')) % shard_count
+
+
+def merge_suggestions(suggestion_lists: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """Merge per-shard suggestions, summing the counts of a text found on several shards
+
+    As on a single node, fuzzy matches are only returned when no shard has
+    a completion.
+    """
+    merged = {}
+    for suggestions in suggestion_lists:
+        for entry in suggestions:
+            current = merged.get(entry['text'])
+            if current is None:
+                merged[entry['text']] = dict(entry)
+                continue
+            current['count'] += entry['count']
+            current['distance'] = min(current['distance'], entry['distance'])
+            if current['type'] == 'term':
+                current['type'] = entry['type']
+
+    completions = [entry for entry in merged.values() if entry['distance'] == 0]
+    entries = completions or list(merged.values())
+    entries.sort(key=lambda entry: (entry['distance'], -entry['count'], entry['text']))
+    return entries[:limit]
+
+
+class ShardCoordinator:
+    """Fans searches out to shard workers and merges their ranked results"""
+
+    def __init__(self, shard_urls: List[str], timeout: float = DEFAULT_TIMEOUT, max_concurrent: int = 1):
+        self.shard_urls = [url.rstrip('/') for url in shard_urls]
+        self.timeout = timeout
+        # Enough threads and connections for max_concurrent searches to
+        # reach every shard at once; health checks get their own threads so
+        # they are never queued behind searches
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=max_concurrent)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.pool = ThreadPoolExecutor(max_workers=len(self.shard_urls) * max_concurrent,
+                                       thread_name_prefix='shard-search')
+        self.health_pool = ThreadPoolExecutor(max_workers=len(self.shard_urls),
+                                              thread_name_prefix='shard-health')
+
+    def __len__(self):
+        return len(self.shard_urls)
+
+    def partition(self, quotes: List[Dict[str, Any]], key_func) -> List[List[Tuple[int, Dict[str, Any]]]]:
+        """Split quotes into per-shard lists of (original position, quote)"""
+        partitions = [[] for _ in self.shard_urls]
+        for position, quote in enumerate(quotes):
+            partitions[shard_for(key_func(quote), len(self.shard_urls))].append((position, quote))
+        return partitions
+
+    def _post(self, url: str, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        headers = {'Accept': 'application/msgpack' if msgpack is not None else 'application/json'}
+        response = self.session.post(f'{url}{path}', json=payload, headers=headers, timeout=self.timeout)
+        response.raise_for_status()
+        if response.headers.get('Content-Type', '').startswith('application/msgpack'):
+            return msgpack.unpackb(response.content)
+        return response.json()
+
+    def _scatter(self, path: str, payloads: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """POST payloads[shard] to every shard that has one, in parallel
+
+        Returns the results by shard (None for shards skipped or failed),
+        the shards that failed and the number queried.
+        """
+        futures = [
+            self.pool.submit(self._post, url, path, payload) if payload is not None else None
+            for url, payload in zip(self.shard_urls, payloads)
+        ]
+        results = []
+        failed = []
+        for shard, future in enumerate(futures):
+            result = None
+            if future is not None:
+                try:
+                    result = future.result()
+                except (requests.RequestException, ValueError) as e:
+                    failed.append({'shard': shard, 'url': self.shard_urls[shard], 'error': str(e)})
+            results.append(result)
+        queried = sum(1 for future in futures if future is not None)
+        return {'results': results, 'failed': failed, 'queried': queried}
+
+    def find_matches(self, query: str, query_keywords: List[str], quotes: List[Dict[str, Any]],
+                     top_k: int, key_func) -> Dict[str, Any]:
+        """Search every shard's partition and merge the top_k matches by score
+
+        Returns the merged matches as (score, original position) pairs, the
+        number of shards queried and the shards that failed to answer.
+        """
+        partitions = self.partition(quotes, key_func)
+        payloads = [
+            {
+                'query': query,
+                'queryKeywords': query_keywords,
+                'quotes': [quote for _, quote in partition],
+                'topK': top_k,
+                'returnIds': True
+            } if partition else None
+            for partition in partitions
+        ]
+        gathered = self._scatter('/api/find-quote', payloads)
+
+        matches = []
+        for result, partition in zip(gathered['results'], partitions):
+            if result is None:
+                continue
+            for match in result.get('matches', []):
+                matches.append((match['score'], partition[match['index']][0]))
+
+        # Highest score first; ties go to the quote posted first
+        matches.sort(key=lambda match: (-match[0], match[1]))
+        return {'matches': matches[:top_k], 'failed': gathered['failed'], 'queried': gathered['queried']}
+
+    def suggest(self, query: str, limit: int, quotes: List[Dict[str, Any]], key_func) -> Dict[str, Any]:
+        """Index each shard's partition of quotes and merge their suggestions
+
+        Every shard is asked, since all of them hold indexed quotes. Each
+        returns its own top limit suggestions, so a text ranked just below
+        that on every shard can be missed.
+        """
+        payloads = [
+            {'query': query, 'limit': limit, 'quotes': [quote for _, quote in partition]}
+            for partition in self.partition(quotes, key_func)
+        ]
+        gathered = self._scatter('/api/suggest', payloads)
+        answered = [result for result in gathered['results'] if result is not None]
+        return {
+            'suggestions': merge_suggestions([result.get('suggestions', []) for result in answered], limit),
+            'indexedQuotes': sum(result.get('indexedQuotes', 0) for result in answered),
+            'failed': gathered['failed'],
+            'queried': gathered['queried']
+        }
+
+    def term_stats(self, terms: List[str]) -> CorpusStats:
+        """Document frequencies of terms summed over every shard that answers"""
+        stats = CorpusStats(store_keywords=False)
+        if not terms:
+            return stats
+        payload = {'terms': sorted(set(terms))}
+        gathered = self._scatter('/api/term-stats', [payload] * len(self.shard_urls))
+        for result in gathered['results']:
+            if result is not None:
+                stats.doc_count += result.get('documents', 0)
+                stats.doc_freq.update(result.get('docFreq', {}))
+        return stats
+
+    def health(self) -> List[Dict[str, Any]]:
+        """Health of every shard, checked in parallel"""
+        def check(shard, url):
+            start = time.perf_counter()
+            try:
+                response = self.session.get(f'{url}/api/health', timeout=self.timeout)
+                data = response.json()
+                status = data.get('status', 'unknown') if response.ok else 'unhealthy'
+            except (requests.RequestException, ValueError) as e:
+                data, status = {'error': str(e)}, 'unreachable'
+            entry = {
+                'shard': shard,
+                'url': url,
+                'status': status,
+                'latencyMs': round((time.perf_counter() - start) * 1000, 1)
+            }
+            if 'indexes' in data:
+                entry['indexes'] = data['indexes']
+            if 'error' in data:
+                entry['error'] = data['error']
+            return entry
+
+        return list(self.health_pool.map(lambda item: check(*item), enumerate(self.shard_urls)))
@@ -0,0 +1,328 @@
+"""
+AIB Quote Manager - State Snapshots
+Periodic snapshots and warm restart of the service's in-memory state.
+
+The indexes and statistics the service builds are saved to a versioned
+binary snapshot file. Every change made after a snapshot is appended to a
+journal. On startup the latest snapshot is stream-loaded and only the
+journal entries past its checkpoint are replayed, instead of rebuilding
+everything from the collection.
+
+Snapshot layout: MAGIC, a 2-byte format version, a 4-byte header length,
+a JSON header (checkpoint sequence, creation time, component names) and a
+pickle of the components. Snapshots are written to a temporary file and
+renamed into place, so a crash never leaves a half-written snapshot.
+
+A store holds an exclusive lock on its directory while open, so two
+processes never append to the same journal.
+"""
+
+import gc
+import json
+import logging
+import os
+import pickle
+import struct
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    import msvcrt
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'AIBSNAP'
+FORMAT_VERSION = 3
+SNAPSHOT_FILE = 'state.snap'
+JOURNAL_FILE = 'journal.jsonl'
+LOCK_FILE = '.lock'
+
+DEFAULT_INTERVAL = 300.0
+
+
+def write_snapshot(path: str, data: bytes, components, checkpoint: int):
+    """Atomically write pickled components to path as a versioned snapshot"""
+    header = json.dumps({
+        'checkpoint': checkpoint,
+        'createdAt': time.time(),
+        'components': sorted(components)
+    }).encode('utf-8')
+
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('>HI', FORMAT_VERSION, len(header)))
+        f.write(header)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path: str):
+    """Stream-load a snapshot; returns (header, components)"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f'{path} is not a snapshot file')
+        version, header_length = struct.unpack('>HI', f.read(6))
+        if version != FORMAT_VERSION:
+            raise ValueError(f'Unsupported snapshot version {version}')
+        header = json.loads(f.read(header_length).decode('utf-8'))
+        # Loading creates millions of objects; collection passes over them
+        # would cost more than the load itself
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            components = pickle.load(f)
+            # They live as long as the process, so keep later collections
+            # from scanning them too
+            gc.freeze()
+        finally:
+            if gc_enabled:
+                gc.enable()
+    return header, components
+
+
+def lock_directory(directory: str):
+    """Take an exclusive lock on a state directory; returns the open lock file
+
+    Raises RuntimeError if another store holds it. The lock is released
+    when the file is closed or the process exits.
+    """
+    lock_file = open(os.path.join(directory, LOCK_FILE), 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:  # pragma: no cover - Windows
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        lock_file.close()
+        raise RuntimeError(f'State directory {directory} is in use by another process')
+    lock_file.truncate(0)
+    lock_file.write(str(os.getpid()))
+    lock_file.flush()
+    return lock_file
+
+
+class SnapshotComponent:
+    """Pickling support for components that guard their state with self.lock
+
+    Locks cannot be pickled, so the lock is left out and a new one is made
+    on load. The component's own lock is not taken while pickling: every
+    change to a stored component goes through StateStore.record(), and
+    StateStore.snapshot() holds the same store lock while it serializes.
+
+    Attributes named in derived_fields are left out too and recreated by
+    rebuild_derived() on load. Serializing holds up record(), so large
+    structures that can be derived from the rest are cheaper to rebuild.
+    """
+
+    derived_fields = ()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('lock',) + self.derived_fields:
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.rebuild_derived()
+
+    def rebuild_derived(self):
+        pass
+
+
+class StateStore:
+    """Journals state changes and snapshots a set of named components
+
+    Callers make changes through record(), which applies them under the
+    store's lock and journals them, so every snapshot matches exactly one
+    journal position. Only serializing the components holds that lock; the
+    snapshot file is written and synced while changes carry on, and entries
+    journaled meanwhile are kept for the next snapshot.
+    """
+
+    def __init__(self, directory: str, components: Dict[str, Any],
+                 handlers: Dict[str, Callable[[Any], Any]], interval: float = DEFAULT_INTERVAL):
+        self.directory = directory
+        self.components = components
+        self.handlers = handlers
+        self.interval = interval
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        self.lock = threading.RLock()
+        self.snapshot_lock = threading.Lock()  # one snapshot at a time
+        self.sequence = 0
+        self.checkpoint = 0
+        self.journal = None
+        self.journal_end = 0  # byte offset after the last complete journal entry
+        self.lock_file = None
+        self.startup = {}
+        self.last_snapshot = None
+
+    def restore(self, started_at: float, on_load: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """Load the latest snapshot, replay the journal and open it for appends
+
+        on_load is called with the loaded components before the journal is
+        replayed, so the caller can swap them in for the handlers to use.
+        started_at is the time.perf_counter() value of process start, used to
+        report time-to-ready.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        self.lock_file = lock_directory(self.directory)
+        mode = 'cold'
+
+        if os.path.exists(self.snapshot_path):
+            try:
+                load_start = time.perf_counter()
+                header, components = read_snapshot(self.snapshot_path)
+                for name, component in components.items():
+                    if name in self.components:
+                        self.components[name] = component
+                self.checkpoint = self.sequence = header['checkpoint']
+                mode = 'warm'
+                self.startup['snapshotLoadMs'] = round((time.perf_counter() - load_start) * 1000, 1)
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError) as e:
+                logger.warning(f"Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+
+        if on_load is not None:
+            on_load(self.components)
+
+        replay_start = time.perf_counter()
+        replayed = 0
+        for entry in self._journal_entries():
+            if entry['seq'] <= self.checkpoint:
+                continue
+            self.handlers[entry['kind']](entry['data'])
+            self.sequence = entry['seq']
+            replayed += 1
+
+        self._drop_torn_tail()
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+        self.startup.update({
+            'mode': mode,
+            'checkpoint': self.checkpoint,
+            'replayedEntries': replayed,
+            'replayMs': round((time.perf_counter() - replay_start) * 1000, 1),
+            'timeToReadyMs': round((time.perf_counter() - started_at) * 1000, 1)
+        })
+        return self.startup
+
+    def _journal_entries(self):
+        self.journal_end = 0
+        if not os.path.exists(self.journal_path):
+            return
+        offset = 0
+        with open(self.journal_path, 'rb') as f:
+            for line in f:
+                offset += len(line)
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError('unterminated line')
+                    entry = json.loads(line)
+                except ValueError:
+                    # A torn final line from a crash mid-append
+                    logger.warning("Skipping unreadable journal line")
+                    continue
+                self.journal_end = offset
+                yield entry
+
+    def _drop_torn_tail(self):
+        """Cut the journal after its last complete entry
+
+        Otherwise the next append would be glued onto a torn line and lost
+        on the following restart.
+        """
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > self.journal_end:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(self.journal_end)
+
+    def record(self, kind: str, data: Any) -> Any:
+        """Apply a change through its handler and journal it"""
+        with self.lock:
+            result = self.handlers[kind](data)
+            self.sequence += 1
+            self.journal.write(json.dumps({'seq': self.sequence, 'kind': kind, 'data': data}) + '\n')
+            self.journal.flush()
+            return result
+
+    def snapshot(self, force: bool = False) -> bool:
+        """Snapshot the components if anything changed since the last one"""
+        with self.snapshot_lock:
+            with self.lock:
+                if self.sequence == self.checkpoint and not force:
+                    return False
+                start = time.perf_counter()
+                checkpoint = self.sequence
+                names = list(self.components)
+                data = pickle.dumps(dict(self.components), protocol=pickle.HIGHEST_PROTOCOL)
+                # Journal entries past this offset are newer than the snapshot
+                journal_offset = os.fstat(self.journal.fileno()).st_size
+                locked_ms = round((time.perf_counter() - start) * 1000, 1)
+
+            write_snapshot(self.snapshot_path, data, names, checkpoint)
+
+            with self.lock:
+                self.checkpoint = checkpoint
+                self._drop_journal_head(journal_offset)
+                self.last_snapshot = {
+                    'checkpoint': checkpoint,
+                    'durationMs': round((time.perf_counter() - start) * 1000, 1),
+                    'lockedMs': locked_ms,
+                    'bytes': os.path.getsize(self.snapshot_path),
+                    'at': time.time()
+                }
+        return True
+
+    def _drop_journal_head(self, offset: int):
+        """Rewrite the journal without its first offset bytes"""
+        self.journal.flush()
+        with open(self.journal_path, 'rb') as f:
+            f.seek(offset)
+            tail = f.read()
+        tmp_path = f'{self.journal_path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(tail)
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal.close()
+        os.replace(tmp_path, self.journal_path)
+        self.journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def close(self):
+        """Close the journal and release the state directory"""
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+                self.journal = None
+            if self.lock_file is not None:
+                self.lock_file.close()
+                self.lock_file = None
+
+    def start_periodic(self):
+        """Snapshot every interval seconds on a daemon thread"""
+        def run():
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    logger.error(f"Snapshot failed: {e}")
+
+        threading.Thread(target=run, name='state-snapshots', daemon=True).start()
+
+    def stats(self) -> Dict[str, Optional[Any]]:
+        return {
+            'directory': self.directory,
+            'sequence': self.sequence,
+            'checkpoint': self.checkpoint,
+            'startup': self.startup,
+            'lastSnapshot': self.last_snapshot
+        }
@@ -49,6 +49,8 @@ export function QuoteApp() {
       setError('');
       const fetchedQuotes = await blockchainService.getAllQuotes();
       setQuotes(fetchedQuotes);
+      // Fill the AI service's typeahead index; suggestions work without it, just empty
+      pythonAIService.seedSuggestions(fetchedQuotes);
     } catch (err) {
       setError(`Failed to load quotes: ${err instanceof Error ? err.message : 'Unknown error'}`);
       console.error('Error loading quotes:', err);
@@ -125,6 +127,7 @@ export function QuoteApp() {
 
   const handleQuoteCreated = (newQuote: Quote, quoteText: string, author: string) => {
     setQuotes(prev => [...prev, newQuote]);
+    pythonAIService.seedSuggestions([newQuote]);
     setShowSuperCreator(false);
     setError('');
     
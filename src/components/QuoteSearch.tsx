@@ -1,4 +1,9 @@
-import { useState } from 'react';
+import { useEffect, useState } from 'react';
+import { pythonAIService } from '../services/pythonAIService';
+import type { QuoteSuggestion } from '../services/pythonAIService';
+
+// Wait this long after the last keystroke before fetching suggestions
+const SUGGEST_DEBOUNCE_MS = 150;
 
 interface QuoteSearchProps {
   onSearch: (keywords: string) => void;
@@ -9,6 +14,26 @@ interface QuoteSearchProps {
 export function QuoteSearch({ onSearch, onRandomQuote, onClearSearch }: QuoteSearchProps) {
   const [searchKeywords, setSearchKeywords] = useState('');
   const [isSearching, setIsSearching] = useState(false);
+  const [suggestions, setSuggestions] = useState<QuoteSuggestion[]>([]);
+
+  useEffect(() => {
+    const query = searchKeywords.trim();
+    if (!query) {
+      setSuggestions([]);
+      return;
+    }
+
+    let cancelled = false;
+    const timer = setTimeout(() => {
+      pythonAIService.getSuggestions(query).then((results) => {
+        if (!cancelled) setSuggestions(results);
+      });
+    }, SUGGEST_DEBOUNCE_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchKeywords]);
 
   const handleSearch = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -49,7 +74,15 @@ export function QuoteSearch({ onSearch, onRandomQuote, onClearSearch }: QuoteSea
             placeholder="Search for quotes by keywords, themes, or emotions..."
             className="search-input"
             disabled={isSearching}
+            list="quote-search-suggestions"
           />
+          <datalist id="quote-search-suggestions">
+            {suggestions.map((suggestion) => (
+              <option key={suggestion.text} value={suggestion.text}>
+                {suggestion.type}
+              </option>
+            ))}
+          </datalist>
           <button 
             type="submit" 
             className="btn btn-primary"
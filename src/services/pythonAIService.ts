@@ -30,9 +30,18 @@ export interface AIAnalysisResult {
 
 export interface QuoteSearchResult {
   selectedQuote: Quote | null;
+  selectedQuoteId?: number;
   explanation: string;
   confidence: number;
   matchScore?: number;
+  duplicatesCollapsed?: number;
+}
+
+export interface QuoteSuggestion {
+  text: string;
+  type: 'term' | 'author' | 'category';
+  count: number;
+  distance: number;
 }
 
 export interface RealtimeStatus {
@@ -111,7 +120,11 @@ class PythonAIService {
   /**
    * Find the best matching quote from a list
    */
-  async findBestQuote(query: string, quotes: Quote[]): Promise<QuoteSearchResult> {
+  async findBestQuote(
+    query: string,
+    quotes: Quote[],
+    collapseDuplicates: boolean = false
+  ): Promise<QuoteSearchResult> {
     try {
       this.notifyStatus({
         processing: true,
@@ -125,7 +138,7 @@ class PythonAIService {
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({ query, quotes }),
+        body: JSON.stringify({ query, quotes, collapseDuplicates }),
       });
 
       if (!response.ok) {
@@ -155,6 +168,46 @@ class PythonAIService {
     }
   }
 
+  /**
+   * Get as-you-type suggestions for a partial search query
+   */
+  async getSuggestions(query: string, limit: number = 8): Promise<QuoteSuggestion[]> {
+    try {
+      const params = new URLSearchParams({ q: query, limit: String(limit) });
+      const response = await fetch(`${AI_API_URL}/suggest?${params}`, {
+        method: 'GET',
+      });
+
+      if (!response.ok) {
+        return [];
+      }
+
+      const data = await response.json();
+      return data.suggestions || [];
+    } catch (error) {
+      console.error('Suggestion lookup error:', error);
+      return [];
+    }
+  }
+
+  /**
+   * Add quotes to the AI service's typeahead index
+   */
+  async seedSuggestions(quotes: Quote[]): Promise<void> {
+    if (quotes.length === 0) return;
+    try {
+      await fetch(`${AI_API_URL}/suggest`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ query: '', quotes }),
+      });
+    } catch (error) {
+      console.error('Suggestion index seeding error:', error);
+    }
+  }
+
   /**
    * Get a random quote with AI insight
    */
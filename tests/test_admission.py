@@ -0,0 +1,101 @@
+from flask import Flask, jsonify
+
+from admission import AdmissionConfig, AdmissionController, TokenBucket, estimate_cost
+
+
+def make_client(**limits):
+    app = Flask(__name__)
+    controller = AdmissionController(AdmissionConfig(**limits))
+    controller.install(app)
+
+    @app.route('/api/work', methods=['POST'])
+    def work():
+        return jsonify({'ok': True})
+
+    @app.route('/api/health')
+    def health():
+        return jsonify({'status': 'healthy'})
+
+    return app.test_client(), controller
+
+
+def quotes(count):
+    return [{'id': i, 'text': 'x'} for i in range(count)]
+
+
+def test_token_bucket_spends_and_reports_wait():
+    bucket = TokenBucket(capacity=10, refill_per_second=2)
+    now = bucket.updated
+    assert bucket.take(8, now) == 0
+    assert bucket.take(6, now) == 2.0
+    assert bucket.take(6, now + 2) == 0
+
+
+def test_token_bucket_never_exceeds_capacity():
+    bucket = TokenBucket(capacity=5, refill_per_second=100)
+    bucket.take(5, bucket.updated)
+    assert bucket.take(6, bucket.updated + 60) > 0
+
+
+def test_cost_grows_with_quotes_and_text():
+    config = AdmissionConfig(quotes_per_unit=10, chars_per_unit=100)
+    assert estimate_cost(None, config) == 1.0
+    assert estimate_cost({'quotes': quotes(20)}, config) == 1.0 + 2 + 0.2
+    assert estimate_cost({'text': 'y' * 300}, config) == 4.0
+
+
+def test_oversized_body_is_rejected_before_parsing():
+    client, controller = make_client(max_body_bytes=100)
+    response = client.post('/api/work', data='{' * 500, content_type='application/json')
+    assert response.status_code == 413
+    assert response.json['reason'] == 'body_too_large'
+
+
+def test_costly_request_is_rejected():
+    client, _ = make_client(max_request_cost=2, quotes_per_unit=10)
+    response = client.post('/api/work', json={'quotes': quotes(50)})
+    assert response.status_code == 413
+    assert response.json['reason'] == 'cost_too_high'
+
+
+def test_cost_above_bucket_capacity_is_rejected_not_rate_limited():
+    client, _ = make_client(max_request_cost=100, bucket_capacity=3, quotes_per_unit=10)
+    response = client.post('/api/work', json={'quotes': quotes(50)})
+    assert response.status_code == 413
+    assert 'Retry-After' not in response.headers
+
+
+def test_rate_limit_returns_retry_after():
+    client, controller = make_client(bucket_capacity=2, refill_per_second=0.5)
+    assert client.post('/api/work', json={}).status_code == 200
+    assert client.post('/api/work', json={}).status_code == 200
+
+    response = client.post('/api/work', json={})
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert controller.metrics()['rejected'] == {'rate_limited': 1}
+
+
+def test_exempt_routes_are_always_admitted():
+    client, _ = make_client(bucket_capacity=1, refill_per_second=0)
+    for _ in range(3):
+        assert client.get('/api/health').status_code == 200
+
+
+def test_full_concurrency_returns_503_and_refunds_budget():
+    client, controller = make_client(max_concurrent=1, bucket_capacity=10)
+    controller.slots.acquire()
+    try:
+        response = client.post('/api/work', json={})
+    finally:
+        controller.slots.release()
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    assert next(iter(controller.buckets.values())).tokens == 10
+
+
+def test_slots_are_released_after_requests():
+    client, controller = make_client(max_concurrent=1)
+    for _ in range(3):
+        assert client.post('/api/work', json={}).status_code == 200
+    assert controller.metrics()['inFlight'] == 0
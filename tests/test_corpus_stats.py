@@ -0,0 +1,63 @@
+from corpus_stats import CorpusStats
+
+
+def make_stats(**documents):
+    stats = CorpusStats()
+    stats.add_documents([(doc_id, terms.split(), None) for doc_id, terms in documents.items()])
+    return stats
+
+
+def test_rank_prefers_rare_terms():
+    stats = make_stats(a='common dream', b='common light', c='common river')
+    assert stats.rank(['common', 'dream']) == ['dream', 'common']
+
+
+def test_rank_weights_repeated_terms():
+    stats = make_stats(a='hope fear', b='hope fear')
+    assert stats.rank(['hope', 'fear', 'fear']) == ['fear', 'hope']
+
+
+def test_rank_breaks_ties_by_position():
+    stats = make_stats(a='alpha beta gamma')
+    assert stats.rank(['gamma', 'alpha', 'beta']) == ['gamma', 'alpha', 'beta']
+    assert stats.rank(['gamma', 'alpha', 'beta'], limit=2) == ['gamma', 'alpha']
+
+
+def test_documents_are_counted_once():
+    stats = make_stats(a='dream big')
+    assert not stats.add_document('a', ['dream', 'big'])
+    assert len(stats) == 1
+    assert stats.doc_freq['dream'] == 1
+
+
+def test_edited_document_replaces_its_terms():
+    stats = make_stats(a='dream big', b='dream small')
+    assert stats.stored_keywords('a') == ['big', 'dream']
+
+    assert stats.add_documents([('a', ['ocean', 'waves'], None)]) == 1
+    assert len(stats) == 2
+    assert stats.doc_freq['dream'] == 1
+    assert 'big' not in stats.doc_freq
+    assert stats.doc_freq['ocean'] == 1
+    assert stats.stored_keywords('a') == ['ocean', 'waves']
+
+
+def test_stored_keywords_ignore_a_stale_fingerprint():
+    stats = CorpusStats()
+    stats.add_documents([('a', ['dream', 'big'], 1)])
+    assert stats.stored_keywords('a', fingerprint=1) == ['dream', 'big']
+    assert stats.stored_keywords('a', fingerprint=2) is None
+
+    stats.add_documents([('a', ['ocean'], 2)])
+    assert stats.stored_keywords('a', fingerprint=2) == ['ocean']
+    assert stats.is_current('a', 2)
+    assert 'dream' not in stats.doc_freq
+
+
+def test_short_rankings_are_complete():
+    stats = make_stats(a='one two')
+    assert stats.stored_keywords('a', limit=10) == ['one', 'two']
+
+    stats = make_stats(a='one two three')
+    assert stats.stored_keywords('a', limit=2) == ['one', 'two']
+    assert stats.stored_keywords('a', limit=3) == ['one', 'two', 'three']
@@ -0,0 +1,85 @@
+import pickle
+import re
+
+from dedup import DuplicateIndex, collapse_duplicates, shingles
+
+
+def tokens(text):
+    return re.sub(r'[^\w\s]', '', text.lower()).split()
+
+
+JOBS = 'The only way to do great work is to love what you do.'
+LENNON = 'Life is what happens when you are busy making other plans.'
+
+
+def test_shingles_of_short_text():
+    assert shingles(['hello']) == {'hello'}
+    assert shingles([]) == set()
+    assert shingles(['a', 'b', 'c']) == {'a b', 'b c'}
+
+
+def test_punctuation_and_case_variants_cluster_together():
+    index = DuplicateIndex()
+    clusters = [
+        index.add(1, tokens(JOBS)),
+        index.add(2, tokens(JOBS.upper().rstrip('.'))),
+        index.add(3, tokens(LENNON)),
+    ]
+    assert clusters == [1, 1, 3]
+    assert index.clusters() == {1: [1, 2], 3: [3]}
+
+
+def test_readding_same_text_is_a_no_op():
+    index = DuplicateIndex()
+    index.add(1, tokens(JOBS))
+    assert index.add(1, tokens(JOBS)) == 1
+    assert len(index) == 1
+
+
+def test_edited_quote_leaves_its_cluster():
+    index = DuplicateIndex()
+    index.add(1, tokens(JOBS))
+    index.add(2, tokens(JOBS))
+    assert index.cluster_of(2) == 1
+
+    index.add(2, tokens('Courage is grace under pressure.'))
+    assert index.cluster_of(1) == 1
+    assert index.cluster_of(2) == 2
+
+
+def test_editing_the_cluster_root_keeps_the_rest_together():
+    index = DuplicateIndex()
+    for quote_id in (1, 2, 3):
+        index.add(quote_id, tokens(JOBS))
+
+    index.add(1, tokens(LENNON))
+    assert index.cluster_of(1) == 1
+    assert index.cluster_of(2) == index.cluster_of(3) == 2
+
+
+def test_collapse_keeps_first_of_each_cluster():
+    assert collapse_duplicates(['a', 'b', 'c', 'd'], [1, 1, 3, 1]) == ['a', 'c']
+
+
+def test_snapshot_round_trip_rebuilds_buckets():
+    index = DuplicateIndex()
+    index.add(1, tokens(JOBS))
+    index.add(2, tokens(LENNON))
+    restored = pickle.loads(pickle.dumps(index))
+    assert restored.buckets == index.buckets
+    assert restored.add(3, tokens(JOBS.lower())) == 1
+    assert restored.clusters() == {1: [1, 3], 2: [2]}
+
+
+def test_quotes_without_words_are_not_clustered():
+    index = DuplicateIndex()
+    assert [index.add(quote_id, []) for quote_id in (1, 2, 3)] == [1, 2, 3]
+    assert index.add(4, tokens(JOBS)) == 4
+    assert collapse_duplicates([1, 2, 3, 4], [index.cluster_of(q) for q in (1, 2, 3, 4)]) == [1, 2, 3, 4]
+
+    # Editing a word-less quote into a duplicate, and back, still works
+    assert index.add(2, tokens(JOBS)) == 4
+    assert index.clusters([2, 4]) == {4: [2, 4]}
+    assert index.add(2, []) == 2
+    assert index.clusters([2, 4]) == {2: [2], 4: [4]}
+    assert pickle.loads(pickle.dumps(index)).buckets == index.buckets
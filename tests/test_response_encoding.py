@@ -0,0 +1,94 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+import response_encoding
+from response_encoding import COMPRESSION_MIN_BYTES, attach_quote, encode_response
+
+SMALL = {'quote': 'Stay hungry.'}
+LARGE = {'quotes': ['Stay hungry, stay foolish.'] * (COMPRESSION_MIN_BYTES // 10)}
+
+
+def get(payload, **headers):
+    app = Flask(__name__)
+
+    @app.route('/payload')
+    def route():
+        return encode_response(payload)
+
+    return app.test_client().get('/payload', headers=headers)
+
+
+def test_json_is_the_default():
+    response = get(SMALL)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == SMALL
+    assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+
+
+def test_msgpack_when_accepted():
+    msgpack = pytest.importorskip('msgpack')
+    response = get(SMALL, Accept='application/msgpack')
+    assert response.mimetype == 'application/msgpack'
+    assert msgpack.unpackb(response.data) == SMALL
+    assert 'Accept' in response.headers['Vary']
+
+
+def test_json_is_preferred_when_it_ranks_higher():
+    response = get(SMALL, Accept='application/json, application/msgpack;q=0.5')
+    assert response.mimetype == 'application/json'
+
+
+def test_msgpack_falls_back_to_json_without_the_package(monkeypatch):
+    monkeypatch.setattr(response_encoding, 'msgpack', None)
+    response = get(SMALL, Accept='application/msgpack')
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.data) == SMALL
+
+
+def test_small_bodies_are_not_compressed():
+    response = get(SMALL, **{'Accept-Encoding': 'gzip, br'})
+    assert 'Content-Encoding' not in response.headers
+    assert json.loads(response.data) == SMALL
+
+
+def test_large_bodies_are_gzipped():
+    response = get(LARGE, **{'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.data)) == LARGE
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_brotli_is_preferred_over_gzip():
+    brotli = pytest.importorskip('brotli')
+    response = get(LARGE, **{'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data)) == LARGE
+
+
+def test_gzip_without_brotli_package(monkeypatch):
+    monkeypatch.setattr(response_encoding, 'brotli', None)
+    response = get(LARGE, **{'Accept-Encoding': 'br, gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+
+
+def test_no_compression_without_accept_encoding():
+    response = get(LARGE, **{'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert json.loads(response.data) == LARGE
+
+
+def test_attach_quote_with_ids():
+    quote = {'id': 7, 'text': 'Stay hungry.'}
+    assert attach_quote({}, quote, ids_only=True) == {'selectedQuoteId': 7}
+    assert attach_quote({}, quote, ids_only=False) == {'selectedQuote': quote}
+    assert attach_quote({}, quote, ids_only=True, field='quote') == {'quoteId': 7}
+
+
+def test_attach_quote_without_an_id_sends_the_quote():
+    quote = {'text': 'Stay hungry.'}
+    assert attach_quote({}, quote, ids_only=True) == {'selectedQuote': quote}
+    assert attach_quote({}, dict(quote, id=None), ids_only=True) == {'selectedQuote': dict(quote, id=None)}
+    assert attach_quote({}, None, ids_only=True) == {'selectedQuote': None}
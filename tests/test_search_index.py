@@ -0,0 +1,107 @@
+import pickle
+
+from search_index import PrefixTrie, SuggestIndex, bounded_edit_distance
+
+QUOTES = [
+    {'id': 1, 'text': 'Stay hungry, stay foolish.', 'author': 'Steve Jobs', 'category': 'motivation'},
+    {'id': 2, 'text': 'Life is what happens when you are busy making other plans.',
+     'author': 'John Lennon', 'category': 'life'},
+    {'id': 3, 'text': 'Happiness depends upon ourselves.', 'author': 'Aristotle', 'category': 'happiness'},
+]
+
+
+def make_index():
+    index = SuggestIndex()
+    index.add_quotes(QUOTES)
+    return index
+
+
+def texts(results):
+    return [entry['text'] for entry in results]
+
+
+def test_prefix_completes_terms():
+    assert 'happens' in texts(make_index().suggest('happ'))
+
+
+def test_quotes_are_indexed_once_per_id():
+    index = make_index()
+    assert index.add_quotes(QUOTES) == 0
+    assert len(index) == 3
+
+
+def test_edited_quote_is_reindexed():
+    index = SuggestIndex()
+    assert index.add_quote({'id': 7, 'text': 'Courage is grace under pressure.'})
+    assert index.add_quote({'id': 8, 'text': 'Pressure makes diamonds.'})
+    assert index.add_quote({'id': 7, 'text': 'Ocean waves keep coming.'})
+
+    assert index.suggest('grac') == []
+    assert texts(index.suggest('ocea')) == ['ocean']
+    assert index.suggest('pressure')[0]['count'] == 1
+    assert index.suggest('courag') == []
+    assert len(index) == 2
+
+
+def test_edit_refreshes_prefix_caches():
+    index = SuggestIndex()
+    index.trie.cache_size = 1
+    index.add_quote({'id': 1, 'text': 'dream'})
+    index.add_quote({'id': 2, 'text': 'dream'})
+    index.add_quote({'id': 3, 'text': 'drive'})
+    assert texts(index.suggest('dr', 1)) == ['dream']
+
+    index.add_quote({'id': 1, 'text': 'drive'})
+    index.add_quote({'id': 2, 'text': 'ocean'})
+    assert index.suggest('dr', 1) == [{'text': 'drive', 'type': 'term', 'count': 2, 'distance': 0}]
+    assert index.suggest('dream') == []
+
+
+def test_author_and_category_words_are_indexed():
+    index = make_index()
+    assert 'jobs' in texts(index.suggest('jobs'))
+    assert 'lennon' in texts(index.suggest('lenn'))
+    assert index.suggest('lenn')[0]['type'] == 'author'
+
+
+def test_whole_author_phrase_completes():
+    assert 'john lennon' in texts(make_index().suggest('john len'))
+
+
+def test_last_word_of_multi_word_input_completes():
+    assert 'stay hungry' in texts(make_index().suggest('stay hun'))
+
+
+def test_typo_falls_back_to_fuzzy_match():
+    results = make_index().suggest('hapiness')
+    assert results[0]['text'] == 'happiness'
+    assert results[0]['distance'] == 1
+
+
+def test_unrelated_input_has_no_suggestions():
+    assert make_index().suggest('zzzzqq') == []
+
+
+def test_bounded_edit_distance():
+    assert bounded_edit_distance('kitten', 'sitting', 3) == 3
+    assert bounded_edit_distance('kitten', 'sitting', 2) is None
+
+
+def test_trie_built_from_weights_matches_incremental_updates():
+    weights = {'dream': 3, 'drive': 1, 'dreamer': 2, 'drama': 1}
+    trie = PrefixTrie(cache_size=2)
+    for key, weight in weights.items():
+        for value in range(1, weight + 1):
+            trie.update(key, value)
+    built = PrefixTrie.from_weights(weights, cache_size=2)
+    for prefix in ('', 'd', 'dr', 'dre', 'dri'):
+        assert built.complete(prefix, 2) == trie.complete(prefix, 2)
+
+
+def test_snapshot_round_trip_rebuilds_the_trie():
+    index = make_index()
+    restored = pickle.loads(pickle.dumps(index))
+    for query in ('happ', 'jobs', 'lenon', 'life'):
+        assert restored.suggest(query) == index.suggest(query)
+    restored.add_quote({'id': 4, 'text': 'Happiness is a habit.'})
+    assert restored.suggest('happiness')[0]['count'] == 2
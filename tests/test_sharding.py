@@ -0,0 +1,221 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+from sharding import ShardCoordinator, merge_suggestions, shard_for
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def quote(quote_id, text='text'):
+    return {'id': quote_id, 'text': text}
+
+
+def make_coordinator(monkeypatch, answer, shards=2):
+    """A coordinator whose shard requests are answered by answer(shard, path, payload)"""
+    coordinator = ShardCoordinator([f'http://shard-{shard}' for shard in range(shards)])
+    calls = []
+
+    def post(url, path, payload):
+        shard = coordinator.shard_urls.index(url)
+        calls.append((shard, path, payload))
+        return answer(shard, path, payload)
+
+    monkeypatch.setattr(coordinator, '_post', post)
+    return coordinator, calls
+
+
+def test_shard_for_is_stable_and_in_range():
+    assert shard_for(42, 3) == shard_for('42', 3)
+    assert {shard_for(key, 3) for key in range(100)} == {0, 1, 2}
+
+
+def test_partition_keeps_original_positions():
+    coordinator = ShardCoordinator(['http://a', 'http://b', 'http://c'])
+    quotes = [quote(quote_id) for quote_id in range(20)]
+    partitions = coordinator.partition(quotes, lambda q: q['id'])
+
+    assert sorted(position for partition in partitions for position, _ in partition) == list(range(20))
+    for shard, partition in enumerate(partitions):
+        for position, item in partition:
+            assert item is quotes[position]
+            assert shard_for(item['id'], 3) == shard
+
+
+def scores_by_id(scores):
+    """Answer searches with a fixed score per quote id, best first"""
+    def answer(shard, path, payload):
+        matches = [
+            {'index': index, 'score': scores[item['id']]}
+            for index, item in enumerate(payload['quotes']) if item['id'] in scores
+        ]
+        matches.sort(key=lambda match: -match['score'])
+        return {'matches': matches[:payload['topK']]}
+    return answer
+
+
+def test_find_matches_merges_by_score_then_position(monkeypatch):
+    quotes = [quote(quote_id) for quote_id in range(10)]
+    scores = {quote_id: 10 * (quote_id % 3) for quote_id in range(10)}
+    coordinator, calls = make_coordinator(monkeypatch, scores_by_id(scores))
+
+    gathered = coordinator.find_matches('query', ['query'], quotes, 4, lambda q: q['id'])
+    assert gathered['matches'] == [(20, 2), (20, 5), (20, 8), (10, 1)]
+    assert gathered['failed'] == []
+    assert all(payload['queryKeywords'] == ['query'] for _, _, payload in calls)
+
+
+def test_find_matches_skips_empty_partitions(monkeypatch):
+    coordinator, calls = make_coordinator(monkeypatch, scores_by_id({0: 5}), shards=3)
+    gathered = coordinator.find_matches('query', [], [quote(0)], 1, lambda q: q['id'])
+    assert gathered['queried'] == 1
+    assert [shard for shard, _, _ in calls] == [shard_for(0, 3)]
+
+
+def test_find_matches_reports_failed_shards(monkeypatch):
+    quotes = [quote(quote_id) for quote_id in range(10)]
+    answer = scores_by_id({quote_id: quote_id for quote_id in range(10)})
+
+    def flaky(shard, path, payload):
+        if shard == 0:
+            raise requests.ConnectionError('refused')
+        return answer(shard, path, payload)
+
+    coordinator, _ = make_coordinator(monkeypatch, flaky)
+    gathered = coordinator.find_matches('query', [], quotes, 10, lambda q: q['id'])
+    assert gathered['queried'] == 2
+    assert [failure['shard'] for failure in gathered['failed']] == [0]
+    assert {position for _, position in gathered['matches']} == {
+        quote_id for quote_id in range(10) if shard_for(quote_id, 2) == 1
+    }
+
+
+def test_merge_suggestions_sums_counts_and_prefers_completions():
+    merged = merge_suggestions([
+        [{'text': 'dream', 'type': 'term', 'count': 2, 'distance': 0}],
+        [{'text': 'dream', 'type': 'category', 'count': 1, 'distance': 0},
+         {'text': 'drama', 'type': 'term', 'count': 4, 'distance': 0}],
+        [{'text': 'dreamt', 'type': 'term', 'count': 9, 'distance': 1}],
+    ], limit=5)
+    assert merged == [
+        {'text': 'drama', 'type': 'term', 'count': 4, 'distance': 0},
+        {'text': 'dream', 'type': 'category', 'count': 3, 'distance': 0},
+    ]
+
+
+def test_term_stats_are_summed_over_answering_shards(monkeypatch):
+    def answer(shard, path, payload):
+        if shard == 2:
+            raise requests.Timeout('slow')
+        return {'documents': 10, 'docFreq': {term: shard + 1 for term in payload['terms']}}
+
+    coordinator, calls = make_coordinator(monkeypatch, answer, shards=3)
+    stats = coordinator.term_stats(['ocean', 'dream', 'ocean'])
+    assert len(stats) == 20
+    assert stats.doc_freq == {'dream': 3, 'ocean': 3}
+    assert all(payload == {'terms': ['dream', 'ocean']} for _, _, payload in calls)
+    assert len(coordinator.term_stats([])) == 0
+
+
+def nltk_data_available():
+    try:
+        from nltk.corpus import stopwords
+        from nltk.tokenize import word_tokenize
+        stopwords.words('english')
+        word_tokenize('ready to go')
+    except LookupError:
+        return False
+    return True
+
+
+def free_ports(count):
+    """First of count consecutive free local ports"""
+    for _ in range(50):
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            base = probe.getsockname()[1]
+        if base + count > 65535:
+            continue
+        try:
+            for port in range(base, base + count):
+                with socket.socket() as probe:
+                    probe.bind(('127.0.0.1', port))
+        except OSError:
+            continue
+        return base
+    raise RuntimeError('No free ports')
+
+
+def wait_until_healthy(url, processes, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        assert all(process.poll() is None for process in processes), 'a server exited'
+        try:
+            health = requests.get(f'{url}/api/health', timeout=5).json()
+            if health['status'] == 'healthy':
+                return
+        except (requests.RequestException, ValueError):
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f'{url} did not become healthy')
+
+
+COLLECTION = [
+    quote(quote_id, f'{word} {other} journey'.capitalize())
+    for quote_id, (word, other) in enumerate(
+        (word, other)
+        for word in ('ocean', 'mountain', 'courage', 'river', 'garden', 'silence')
+        for other in ('dreams', 'light', 'patience', 'wisdom', 'fortune', 'sorrow', 'hope')
+    )
+]
+
+
+@pytest.mark.skipif(not nltk_data_available(), reason='NLTK data is not installed')
+def test_local_cluster_matches_a_single_node():
+    env = dict(os.environ, AI_STATE_DIR='')
+    single_port = free_ports(1)
+    cluster_port = free_ports(1)
+    worker_port = free_ports(3)
+    single = subprocess.Popen(
+        [sys.executable, 'ai_server.py', '--port', str(single_port), '--no-debug'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    cluster = subprocess.Popen(
+        [sys.executable, 'run_shards.py', '--shards', '3',
+         '--port', str(cluster_port), '--worker-port', str(worker_port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        single_url = f'http://localhost:{single_port}'
+        cluster_url = f'http://localhost:{cluster_port}'
+        wait_until_healthy(single_url, [single])
+        wait_until_healthy(cluster_url, [cluster])
+
+        # Seed both, as the app does when it loads the collection
+        for url in (single_url, cluster_url):
+            requests.post(f'{url}/api/suggest', json={'query': '', 'quotes': COLLECTION}, timeout=30)
+
+        for query in ('ocean', 'courage and hope', 'wisdom journey', 'garden light'):
+            payload = {'query': query, 'quotes': COLLECTION, 'topK': 5, 'returnIds': True}
+            single_result = requests.post(f'{single_url}/api/find-quote', json=payload, timeout=30).json()
+            cluster_result = requests.post(f'{cluster_url}/api/find-quote', json=payload, timeout=30).json()
+            assert single_result['matches'], query
+            assert cluster_result['matches'] == single_result['matches'], query
+            assert 'partial' not in cluster_result
+
+        suggestions = [
+            requests.get(f'{url}/api/suggest', params={'q': 'jour'}, timeout=30).json()['suggestions']
+            for url in (single_url, cluster_url)
+        ]
+        assert suggestions[0] == suggestions[1]
+    finally:
+        for process in (single, cluster):
+            process.send_signal(signal.SIGTERM)
+        for process in (single, cluster):
+            process.wait(timeout=30)
@@ -0,0 +1,150 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+import snapshot
+from snapshot import SnapshotComponent, StateStore
+
+
+class Values(SnapshotComponent):
+    def __init__(self):
+        self.items = []
+        self.lock = threading.Lock()
+
+
+def make_store(directory):
+    components = {'values': Values()}
+
+    def append(data):
+        components['values'].items.append(data)
+
+    return StateStore(str(directory), components, {'append': append})
+
+
+def restart(store, directory):
+    store.close()
+    restarted = make_store(directory)
+    restarted.restore(time.perf_counter())
+    return restarted
+
+
+def test_cold_start_then_warm_restore(tmp_path):
+    store = make_store(tmp_path)
+    assert store.restore(time.perf_counter())['mode'] == 'cold'
+    store.record('append', 'a')
+    store.record('append', 'b')
+    assert store.snapshot()
+
+    restarted = restart(store, tmp_path)
+    assert restarted.startup['mode'] == 'warm'
+    assert restarted.startup['replayedEntries'] == 0
+    assert restarted.components['values'].items == ['a', 'b']
+    assert restarted.components['values'].lock is not None
+
+
+def test_entries_after_the_checkpoint_are_replayed(tmp_path):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    for item in 'abc':
+        store.record('append', item)
+    store.snapshot()
+    store.record('append', 'd')
+    store.record('append', 'e')
+
+    restarted = restart(store, tmp_path)
+    assert restarted.startup['checkpoint'] == 3
+    assert restarted.startup['replayedEntries'] == 2
+    assert restarted.sequence == 5
+    assert restarted.components['values'].items == list('abcde')
+
+
+def test_snapshot_truncates_the_journal(tmp_path):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    store.record('append', 'a')
+    store.snapshot()
+    assert os.path.getsize(store.journal_path) == 0
+    assert not store.snapshot()
+
+
+def test_changes_during_the_write_are_kept(tmp_path, monkeypatch):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    store.record('append', 'a')
+
+    write = snapshot.write_snapshot
+
+    def write_while_recording(*args):
+        # record() must not wait for the file write
+        writer = threading.Thread(target=store.record, args=('append', 'b'))
+        writer.start()
+        writer.join(timeout=5)
+        assert not writer.is_alive()
+        write(*args)
+
+    monkeypatch.setattr(snapshot, 'write_snapshot', write_while_recording)
+    store.snapshot()
+    assert store.checkpoint == 1
+    assert store.last_snapshot['lockedMs'] <= store.last_snapshot['durationMs']
+
+    restarted = restart(store, tmp_path)
+    assert restarted.startup['replayedEntries'] == 1
+    assert restarted.components['values'].items == ['a', 'b']
+
+
+def test_torn_journal_line_is_skipped(tmp_path):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    store.record('append', 'a')
+    store.journal.write('{"seq": 2, "ki')
+    store.journal.flush()
+
+    restarted = restart(store, tmp_path)
+    assert restarted.components['values'].items == ['a']
+
+    # Appends after the restart must survive the next one
+    restarted.record('append', 'b')
+    again = restart(restarted, tmp_path)
+    assert again.sequence == 2
+    assert again.components['values'].items == ['a', 'b']
+
+
+def test_unreadable_snapshot_falls_back_to_the_journal(tmp_path):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    store.record('append', 'a')
+    with open(store.snapshot_path, 'wb') as f:
+        f.write(b'not a snapshot')
+
+    restarted = restart(store, tmp_path)
+    assert restarted.startup['mode'] == 'cold'
+    assert restarted.components['values'].items == ['a']
+
+
+def test_second_store_on_a_directory_is_refused(tmp_path):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    with pytest.raises(RuntimeError):
+        make_store(tmp_path).restore(time.perf_counter())
+
+    store.close()
+    make_store(tmp_path).restore(time.perf_counter())
+
+
+def test_directory_lock_holds_across_processes(tmp_path):
+    store = make_store(tmp_path)
+    store.restore(time.perf_counter())
+    script = 'import sys; from snapshot import lock_directory; lock_directory(sys.argv[1])'
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    result = subprocess.run([sys.executable, '-c', script, str(tmp_path)], cwd=root, capture_output=True)
+    assert result.returncode != 0
+    assert b'in use by another process' in result.stderr
+
+    store.close()
+    result = subprocess.run([sys.executable, '-c', script, str(tmp_path)], cwd=root, capture_output=True)
+    assert result.returncode == 0